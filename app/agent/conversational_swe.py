@@ -1,12 +1,22 @@
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, BinaryIO, Deque, Dict, List, Optional, Any
+import asyncio
+import hashlib
+from collections import deque
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
 import json
 import os
-from pydantic import Field, model_validator
+import re
+import threading
+import uuid
+from pydantic import Field, PrivateAttr, model_validator
+from pydantic_core import to_json
 
 from app.agent.toolcall import ToolCallAgent
 from app.config import config
 from app.logger import logger
+from app.prompt.conversational_swe import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import Message, AgentState
 from app.tool import (
     Bash,
@@ -22,6 +32,185 @@ from app.tool.conversation_swe_tools import (
     RequirementClarifier
 )
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+
+def _dump_json(data: Any) -> bytes:
+    """将数据序列化为带缩进的 UTF-8 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _load_json(raw: bytes) -> Any:
+    """解析 JSON 字节串"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dump_json_line(data: Any) -> bytes:
+    """将数据序列化为以换行结尾的单行 JSON，用于追加日志"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _read_session_file(session_file: str) -> Any:
+    """读取并解析会话文件，在工作线程中调用"""
+    return _load_json(Path(session_file).read_bytes())
+
+
+def _ensure_dir(path: str) -> None:
+    """确保目录存在；每次都检查，运行期间目录被删除或工作目录切换后仍能重新创建"""
+    if path:
+        os.makedirs(path, exist_ok=True)
+
+
+def _truncate(text: str, limit: int = 200) -> str:
+    """截断过长的文本，超出部分以省略号表示"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+# 会话元数据文件后缀及其包含的字段，列出会话时只需读取这些字段
+_SESSION_META_SUFFIX = ".meta.json"
+_SESSION_META_KEYS = (
+    "session_id",
+    "created_at",
+    "current_conversation_turn",
+    "current_step",
+    "conversation_summary",
+)
+
+
+def _write_session_snapshot(session_file: str, session_data: Dict[str, Any], messages: List[Message]) -> None:
+    """写入会话快照及其元数据文件
+
+    消息由 pydantic-core 直接序列化为 JSON 字节（与 Message.to_dict 的输出一致），
+    逐条写入文件末尾的 messages 数组，不构建中间字典，写出的文件仍是合法的 JSON。
+    """
+    with open(session_file, 'wb') as f:
+        # 去掉结尾的 "\n}"，在其后接上 messages 数组
+        f.write(_dump_json(session_data)[:-2])
+        f.write(b',\n  "messages": [')
+        for index, msg in enumerate(messages):
+            f.write(b",\n    " if index else b"\n    ")
+            f.write(to_json(msg, exclude_none=True))
+        f.write(b"\n  ]\n}" if messages else b"]\n}")
+
+    # 单独保存元数据，列出会话时无需解析完整的消息历史
+    with open(_session_meta_path(session_file), 'wb') as f:
+        f.write(_dump_json({key: session_data[key] for key in _SESSION_META_KEYS}))
+
+
+def _new_session_id() -> str:
+    """生成会话ID，时间戳后附加随机后缀，同一秒内创建的会话也不会共用文件"""
+    return f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def _session_meta_path(session_file: str) -> str:
+    """获取会话文件对应的元数据文件路径"""
+    return os.path.splitext(session_file)[0] + _SESSION_META_SUFFIX
+
+
+def _history_log_path(session_file: str) -> str:
+    """获取会话文件对应的开发历史日志路径"""
+    return os.path.splitext(session_file)[0] + ".history.jsonl"
+
+
+def _read_history_log(session_file: str, maxlen: Optional[int] = None) -> tuple[Deque[Dict[str, Any]], int]:
+    """逐行回放开发历史日志，跳过异常中断时写坏的行
+
+    返回最近的 maxlen 条记录以及日志中的记录总数
+    """
+    log_file = _history_log_path(session_file)
+    records = deque(maxlen=maxlen)
+    total = 0
+    if not os.path.exists(log_file):
+        return records, total
+
+    with open(log_file, 'rb') as f:
+        for line in f:
+            try:
+                records.append(_load_json(line))
+            except ValueError:
+                continue
+            total += 1
+
+    return records, total
+
+
+def _read_session_meta(session_file: str) -> Dict[str, Any]:
+    """读取会话元数据，旧会话没有元数据文件时回退到完整会话文件"""
+    meta_file = _session_meta_path(session_file)
+    path = meta_file if os.path.exists(meta_file) else session_file
+    with open(path, 'rb') as f:
+        return _load_json(f.read())
+
+
+def _list_session_files(conversations_dir: str, limit: Optional[int] = None) -> List[str]:
+    """列出会话文件路径，指定 limit 时只返回最近修改的 limit 个"""
+    with os.scandir(conversations_dir) as it:
+        entries = [
+            entry for entry in it
+            if entry.name.endswith('.json') and not entry.name.endswith(_SESSION_META_SUFFIX)
+        ]
+
+    # 先按修改时间筛选，再读取元数据
+    if limit is not None:
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        entries = entries[:limit]
+
+    return [entry.path for entry in entries]
+
+
+def _session_info(session_file: str, session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """由会话元数据生成会话列表中的条目"""
+    return {
+        "session_id": session_data.get("session_id"),
+        "file_path": session_file,
+        "created_at": session_data.get("created_at"),
+        "conversation_turns": session_data.get("current_conversation_turn", 0),
+        "steps": session_data.get("current_step", 0),
+        "summary": session_data.get("conversation_summary", "")
+    }
+
+
+# 无状态的工具在所有智能体实例间共享，避免每次创建智能体都重新构建
+_PYTHON_EXECUTE = PythonExecute()
+_ASK_HUMAN = AskHuman()
+_CODE_REVIEW = ConversationalCodeReview()
+_REQUIREMENT_CLARIFIER = RequirementClarifier()
+_TERMINATE = Terminate()
+
+
+# 动态上下文始终追加在静态的 NEXT_STEP_PROMPT 之后，保证提示词前缀稳定，便于LLM复用前缀缓存
+_CONTEXT_SEPARATOR = "\n\n当前上下文：\n"
+
+
+# 用户偏好关键词，按偏好类型分组
+_PREFERENCE_KEYWORDS = {
+    "python版本": ["python3.8", "python3.9", "python3.10", "python3.11"],
+    "代码风格": ["pep8", "black", "flake8"],
+    "测试框架": ["pytest", "unittest", "nose"],
+    "包管理": ["pip", "poetry", "conda"]
+}
+
+# 小写关键词 -> (偏好类型, 关键词, 在该类型中的顺序)；同一类型命中多个关键词时取表中靠后的一个
+_PREFERENCE_LOOKUP = {
+    keyword.lower(): (pref_type, keyword, order)
+    for pref_type, keywords in _PREFERENCE_KEYWORDS.items()
+    for order, keyword in enumerate(keywords)
+}
+
+# 将所有小写关键词合并为一个正则（长关键词优先），对小写输入扫描一次即可找出全部命中
+_PREFERENCE_PATTERN = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(_PREFERENCE_LOOKUP, key=len, reverse=True))
+)
+
 
 class ConversationalSWEAgent(ToolCallAgent):
     """
@@ -38,28 +227,28 @@ class ConversationalSWEAgent(ToolCallAgent):
     name: str = "ConversationalSWE"
     description: str = "专注于多轮对话的软件开发智能体，支持渐进式开发和智能交互"
 
-    # 系统提示词将在后面定义
-    system_prompt: str = ""
-    next_step_prompt: str = ""
+    system_prompt: str = SYSTEM_PROMPT.format(directory=config.workspace_root)
+    next_step_prompt: str = NEXT_STEP_PROMPT
 
         # 开发工具集
     available_tools: ToolCollection = Field(
         default_factory=lambda: ToolCollection(
-            Bash(),
-            StrReplaceEditor(),
-            PythonExecute(),
-            AskHuman(),
-            ConversationalCodeReview(),
-            ProjectProgressTracker(),
-            RequirementClarifier(),
-            Terminate()
+            Bash(),  # 每个智能体独立的shell会话
+            StrReplaceEditor(),  # 每个智能体独立的撤销历史
+            _PYTHON_EXECUTE,
+            _ASK_HUMAN,
+            _CODE_REVIEW,
+            ProjectProgressTracker(),  # 每个智能体独立的未写回进度数据及索引
+            _REQUIREMENT_CLARIFIER,
+            _TERMINATE
         )
     )
-    special_tool_names: List[str] = Field(default_factory=lambda: [Terminate().name])
+    special_tool_names: List[str] = Field(default_factory=lambda: [_TERMINATE.name])
 
     # 对话上下文管理
     conversation_context: Dict[str, Any] = Field(default_factory=dict)
-    development_history: List[Dict[str, Any]] = Field(default_factory=list)
+    development_history: Deque[Dict[str, Any]] = Field(default_factory=deque)
+    max_history_records: int = 200  # 内存中保留的开发记录数量，完整历史见开发历史日志
     user_preferences: Dict[str, Any] = Field(default_factory=dict)
 
     # 执行控制
@@ -76,71 +265,51 @@ class ConversationalSWEAgent(ToolCallAgent):
     session_id: Optional[str] = None
     session_file: Optional[str] = None
     auto_save: bool = True
+    autosave_delay: float = 0.2  # 保存请求的合并窗口（秒），窗口内的多次请求只写入一次
+
+    _history_count: int = 0  # 开发记录总数（不受 max_history_records 限制）
+    _state_version: int = 0  # 对话状态版本号，上下文、历史或偏好变化时递增
+    _summary_cache: Optional[tuple] = None  # (缓存键, 对话摘要)
+    _save_pending: bool = False  # 是否有尚未写入的保存请求
+    _save_task: Optional[asyncio.Task] = None  # 后台保存任务
+    _save_wakeup: Optional[asyncio.Event] = None  # 由 flush_session 设置，提前结束合并窗口
+    _step_queue: Optional[asyncio.Queue] = None  # stream() 运行期间接收每一步的结果
+    _history_pending: List[tuple] = []  # 待追加的 (日志路径, 日志行) 列表
+    _history_task: Optional[asyncio.Task] = None  # 后台日志写入任务
+    _history_file: Optional[BinaryIO] = None  # 懒打开的开发历史日志句柄，切换会话或退出时关闭
+    _history_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)  # 串行化日志写入与句柄关闭
+    _prompt_prefix_hash: str = ""  # 静态提示词前缀的哈希
 
     @model_validator(mode="after")
     def setup_prompts(self) -> "ConversationalSWEAgent":
-        """初始化提示词和会话"""
-        self.system_prompt = self._build_system_prompt()
-        self.next_step_prompt = self._build_next_step_prompt()
+        """初始化会话"""
+        self.development_history = deque(self.development_history, maxlen=self.max_history_records)
+        self._history_count = len(self.development_history)
+        self._prompt_prefix_hash = hashlib.sha256(
+            f"{self.system_prompt}\0{NEXT_STEP_PROMPT}".encode("utf-8")
+        ).hexdigest()
 
-        # 初始化会话
         if not self.session_id:
-            self.session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            self.session_id = _new_session_id()
 
         if not self.session_file:
             self.session_file = f"conversations/{self.session_id}.json"
 
         return self
 
-    def _build_system_prompt(self) -> str:
-        """构建系统提示词"""
-        return f"""你是ConversationalSWE，一个专注于多轮对话的软件开发智能体。
-
-核心特点：
-1. **对话驱动开发**：通过自然对话理解用户需求，渐进式完成开发任务
-2. **智能提问**：当需求不明确时，主动询问用户获取更多信息
-3. **上下文感知**：记住对话历史，理解开发过程中的上下文
-4. **渐进式交付**：将复杂任务分解为多个步骤，每步都与用户确认
-
-工作目录：{config.workspace_root}
-
-工作方式：
-- 仔细理解用户的开发需求
-- 如果需求不明确，主动提问澄清
-- 将大型任务分解为小步骤
-- 每个关键步骤完成后，总结进展并询问用户意见
-- 根据用户反馈调整开发方向
-- 支持代码审查和迭代优化
-
-对话原则：
-- 使用简洁、友好的中文交流
-- 主动解释技术决策的原因
-- 在执行重要操作前征求用户同意
-- 记住用户的编程偏好和项目要求
-"""
+    @property
+    def prompt_prefix_hash(self) -> str:
+        """静态提示词前缀（系统提示词 + 下一步提示词模板）的哈希，可作为LLM前缀缓存的键"""
+        return self._prompt_prefix_hash
 
     def _build_next_step_prompt(self) -> str:
-        """构建下一步提示词"""
+        """构建下一步提示词，动态上下文只追加在静态前缀之后"""
         context_info = self._get_conversation_context_summary()
 
-        base_prompt = """
-基于当前对话上下文和开发进展，选择最合适的下一步行动：
-
-1. 如果用户需求不明确，使用 `ask_human` 工具提问澄清
-2. 如果需要执行代码或命令，使用相应的工具
-3. 如果需要编辑文件，使用 `str_replace_editor` 工具
-4. 如果当前步骤完成，总结进展并询问用户下一步计划
-5. 如果任务全部完成，使用 `terminate` 工具结束
-
-记住：
-- 保持对话的连贯性和上下文感知
-- 每次重要操作前都要解释你的思路
-- 优先确保用户理解和同意你的方案"""
-
         if context_info:
-            return f"{base_prompt}\n\n当前上下文：\n{context_info}"
+            return f"{NEXT_STEP_PROMPT}{_CONTEXT_SEPARATOR}{context_info}"
 
-        return base_prompt
+        return NEXT_STEP_PROMPT
 
     def _get_conversation_context_summary(self) -> str:
         """获取对话上下文摘要"""
@@ -150,11 +319,11 @@ class ConversationalSWEAgent(ToolCallAgent):
             context_parts.append(f"项目背景：{self.conversation_context}")
 
         if self.development_history:
-            recent_history = self.development_history[-3:]  # 最近3个操作
-            history_summary = "\n".join([
+            recent_history = reversed(list(islice(reversed(self.development_history), 3)))  # 最近3个操作
+            history_summary = "\n".join(
                 f"- {item.get('timestamp', '')}: {item.get('action', '')}"
                 for item in recent_history
-            ])
+            )
             context_parts.append(f"最近操作：\n{history_summary}")
 
         if self.pending_clarifications:
@@ -165,7 +334,8 @@ class ConversationalSWEAgent(ToolCallAgent):
     def update_conversation_context(self, key: str, value: Any) -> None:
         """更新对话上下文"""
         self.conversation_context[key] = value
-        logger.info(f"📝 更新对话上下文: {key} = {value}")
+        self._state_version += 1
+        logger.info("📝 更新对话上下文: {} = {}", key, value)
 
     def add_development_record(self, action: str, details: str = "", result: str = "") -> None:
         """添加开发历史记录"""
@@ -176,32 +346,104 @@ class ConversationalSWEAgent(ToolCallAgent):
             "result": result,
             "conversation_turn": self.current_conversation_turn
         }
-        self.development_history.append(record)
-        logger.info(f"📚 记录开发历史: {action}")
+        self._extend_development_history([record])
+        logger.info("📚 记录开发历史: {}", action)
+
+    def _extend_development_history(self, records: List[Dict[str, Any]]) -> None:
+        """批量添加开发记录，并一次性追加到会话日志"""
+        self.development_history.extend(records)
+        self._history_count += len(records)
+        self._state_version += 1
+        self._append_history_log(records)
+
+    def _append_history_log(self, records: List[Dict[str, Any]]) -> None:
+        """将开发记录追加到会话日志，避免每次保存都重写完整历史
+
+        写入在后台任务中进行；没有运行中的事件循环时直接写入
+        """
+        if not self.auto_save or not records:
+            return
+
+        # 在提交时确定日志路径，切换会话后尚未写入的记录仍写入原会话的日志
+        data = b"".join(_dump_json_line(record) for record in records)
+        self._history_pending.append((_history_log_path(self.session_file), data))
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._drain_history_log()
+            return
+
+        if self._history_task is None or self._history_task.done():
+            self._history_task = asyncio.create_task(self._history_loop())
+
+    async def _history_loop(self) -> None:
+        """后台日志写入循环，直到没有待追加的记录"""
+        try:
+            while self._history_pending:
+                await asyncio.to_thread(self._drain_history_log)
+        except asyncio.CancelledError:
+            # 事件循环关闭时写完剩余记录，再继续传播取消；
+            # 被取消的 to_thread 仍在工作线程中运行，由 _history_lock 保证两次写入不会交错
+            self._drain_history_log()
+            raise
+
+    def _drain_history_log(self) -> None:
+        """将待追加的记录写入日志，复用已打开的文件句柄，日志路径变化时重新打开"""
+        with self._history_lock:
+            while self._history_pending:
+                log_file, data = self._history_pending.pop(0)
+                try:
+                    if self._history_file is None or self._history_file.name != log_file:
+                        if self._history_file is not None:
+                            self._history_file.close()
+                            self._history_file = None
+                        _ensure_dir(os.path.dirname(log_file))
+                        self._history_file = open(log_file, 'ab')
+                    self._history_file.write(data)
+                    self._history_file.flush()
+                except Exception as e:
+                    logger.error(f"❌ 写入开发历史日志失败: {e}")
+
+    def _close_history_log(self) -> None:
+        """关闭开发历史日志句柄"""
+        with self._history_lock:
+            if self._history_file is not None:
+                self._history_file.close()
+                self._history_file = None
+
+    async def flush_history_log(self) -> None:
+        """等待待追加的开发记录写入日志"""
+        if self._history_task is not None:
+            await self._history_task
 
     def add_pending_clarification(self, question: str) -> None:
         """添加待澄清的问题"""
         self.pending_clarifications.append(question)
-        logger.info(f"❓ 添加待澄清问题: {question}")
+        logger.info("❓ 添加待澄清问题: {}", question)
 
     def clear_pending_clarifications(self) -> None:
         """清除待澄清问题"""
         self.pending_clarifications.clear()
         logger.info("✅ 清除所有待澄清问题")
 
-    async def think(self) -> bool:
-        """增强的思考过程，加入对话上下文"""
-        # 更新对话轮次
-        self.current_conversation_turn += 1
+    async def run(self, request: Optional[str] = None) -> str:
+        """处理一轮用户请求，每次调用计为一个对话轮次
 
-        # 检查是否超过最大对话轮数
-        if self.current_conversation_turn > self.max_conversation_turns:
-            logger.warning("⚠️ 达到最大对话轮数，建议总结当前进展")
-            self.update_memory(
-                "system",
-                "已达到最大对话轮数，请总结当前开发进展并询问用户是否继续"
+        达到最大对话轮数后不再调用LLM，直接返回提示，由用户开始新的对话
+        """
+        if self.current_conversation_turn >= self.max_conversation_turns:
+            logger.warning("⚠️ 达到最大对话轮数，未执行本轮请求")
+            return (
+                f"⚠️ 已达到最大对话轮数（{self.max_conversation_turns}轮），本轮请求未执行。"
+                "请开始新的对话继续开发（交互模式中输入 'new'）。"
             )
 
+        self.current_conversation_turn += 1
+        return await super().run(request)
+
+    async def think(self) -> bool:
+        """增强的思考过程，加入对话上下文"""
         # 动态更新next_step_prompt以包含最新上下文
         self.next_step_prompt = self._build_next_step_prompt()
 
@@ -217,15 +459,70 @@ class ConversationalSWEAgent(ToolCallAgent):
 
         # 记录本轮操作
         if self.tool_calls:
-            for tool_call in self.tool_calls:
-                self.add_development_record(
-                    action=f"执行工具: {tool_call.function.name}",
-                    details=tool_call.function.arguments,
-                    result=result[:200] + "..." if len(result) > 200 else result
-                )
+            # 本轮所有工具调用共用同一时间戳和结果摘要
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            result_summary = _truncate(result)
+            records = [
+                {
+                    "timestamp": timestamp,
+                    "action": f"执行工具: {tool_call.function.name}",
+                    "details": tool_call.function.arguments,
+                    "result": result_summary,
+                    "conversation_turn": self.current_conversation_turn
+                }
+                for tool_call in self.tool_calls
+            ]
+            self._extend_development_history(records)
+            logger.info("📚 记录 {} 个工具调用", len(records))
+
+        return result
 
+    async def step(self) -> str:
+        """执行一步，stream() 运行期间同时将本步结果交给输出队列"""
+        result = await super().step()
+        if self._step_queue is not None:
+            # 与 run() 返回值中每一步的格式一致
+            self._step_queue.put_nowait(f"Step {self.current_step}: {result}")
         return result
 
+    async def stream(self, request: Optional[str] = None) -> AsyncIterator[str]:
+        """运行智能体，每完成一步即产出该步结果
+
+        产出的片段依次拼接后与 run() 的返回值相同；提前结束迭代时会取消本次运行。
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._step_queue = queue
+        run_task = asyncio.create_task(self.run(request))
+        run_task.add_done_callback(lambda _: queue.put_nowait(None))
+
+        emitted = 0
+        try:
+            while (chunk := await queue.get()) is not None:
+                if emitted:
+                    chunk = "\n" + chunk
+                emitted += len(chunk)
+                yield chunk
+
+            # 补上步骤之外的结果，如达到最大步数的提示
+            result = run_task.result()
+            if len(result) > emitted:
+                yield result[emitted:]
+        finally:
+            self._step_queue = None
+            if not run_task.done():
+                run_task.cancel()
+                await asyncio.gather(run_task, return_exceptions=True)
+
+    async def warm_llm(self, timeout: float = 10.0) -> None:
+        """预热到LLM服务的连接，在等待用户输入时提前完成连接建立，失败时忽略"""
+        models = getattr(self.llm.client, "models", None)
+        if models is None:
+            return
+        try:
+            await asyncio.wait_for(models.list(), timeout)
+        except Exception as e:
+            logger.debug("LLM连接预热失败: {}", e)
+
     async def handle_user_response(self, user_input: str) -> None:
         """处理用户回复"""
         self.waiting_for_user_input = False
@@ -237,26 +534,29 @@ class ConversationalSWEAgent(ToolCallAgent):
         # 尝试从用户回复中提取偏好设置
         self._extract_user_preferences(user_input)
 
-        logger.info(f"👤 收到用户回复: {user_input[:100]}...")
+        logger.info("👤 收到用户回复: {:.100}...", user_input)
 
     def _extract_user_preferences(self, user_input: str) -> None:
         """从用户输入中提取偏好设置"""
-        # 简单的偏好提取逻辑，可以扩展
-        preferences_keywords = {
-            "python版本": ["python3.8", "python3.9", "python3.10", "python3.11"],
-            "代码风格": ["pep8", "black", "flake8"],
-            "测试框架": ["pytest", "unittest", "nose"],
-            "包管理": ["pip", "poetry", "conda"]
-        }
-
-        for pref_type, keywords in preferences_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in user_input.lower():
-                    self.user_preferences[pref_type] = keyword
-                    logger.info(f"🎯 检测到用户偏好: {pref_type} = {keyword}")
+        # 简单的偏好提取逻辑，可在 _PREFERENCE_KEYWORDS 中扩展
+        found: Dict[str, tuple] = {}
+        for match in _PREFERENCE_PATTERN.finditer(user_input.lower()):
+            pref_type, keyword, order = _PREFERENCE_LOOKUP[match.group()]
+            # 按关键词表的顺序而非在输入中出现的顺序决定优先级
+            if pref_type not in found or order > found[pref_type][1]:
+                found[pref_type] = (keyword, order)
+
+        for pref_type, (keyword, _) in found.items():
+            self.user_preferences[pref_type] = keyword
+            self._state_version += 1
+            logger.info("🎯 检测到用户偏好: {} = {}", pref_type, keyword)
 
     def get_conversation_summary(self) -> str:
-        """获取对话摘要"""
+        """获取对话摘要，状态未变化时直接返回缓存结果"""
+        cache_key = (self._state_version, self.current_conversation_turn, self.current_step)
+        if self._summary_cache and self._summary_cache[0] == cache_key:
+            return self._summary_cache[1]
+
         summary_parts = [
             f"=== 对话摘要 ===",
             f"对话轮次: {self.current_conversation_turn}",
@@ -267,13 +567,15 @@ class ConversationalSWEAgent(ToolCallAgent):
             summary_parts.append(f"项目背景: {self.conversation_context}")
 
         if self.user_preferences:
-            prefs = ", ".join([f"{k}:{v}" for k, v in self.user_preferences.items()])
+            prefs = ", ".join(f"{k}:{v}" for k, v in self.user_preferences.items())
             summary_parts.append(f"用户偏好: {prefs}")
 
         if self.development_history:
-            summary_parts.append(f"完成操作: {len(self.development_history)}个")
+            summary_parts.append(f"完成操作: {self._history_count}个")
 
-        return "\n".join(summary_parts)
+        summary = "\n".join(summary_parts)
+        self._summary_cache = (cache_key, summary)
+        return summary
 
     async def cleanup(self):
         """清理资源并保存会话"""
@@ -286,7 +588,7 @@ class ConversationalSWEAgent(ToolCallAgent):
         # 输出会话摘要
         logger.info("📊 " + self.get_conversation_summary())
 
-        # 保存会话
+        # 请求保存会话，写入在合并窗口结束后进行；退出前由调用方调用 flush_session
         if self.auto_save:
             await self.save_session()
 
@@ -294,25 +596,66 @@ class ConversationalSWEAgent(ToolCallAgent):
         await super().cleanup()
 
     async def save_session(self) -> None:
-        """保存会话到文件"""
+        """请求保存会话
+
+        写入在后台任务中进行，autosave_delay 窗口内及写入期间到达的多次请求会合并为一次写入。
+        需要确保已写入磁盘时，调用 flush_session 等待完成。
+        """
+        self._save_pending = True
+        if self._save_wakeup is None:
+            self._save_wakeup = asyncio.Event()
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_loop())
+
+    async def flush_session(self) -> None:
+        """跳过合并窗口，等待挂起的会话保存及开发历史日志写入完成
+
+        在切换会话或退出前调用，写完后关闭开发历史日志句柄
+        """
+        await self.flush_history_log()
+        self._close_history_log()
+        if self._save_task is not None:
+            self._save_wakeup.set()
+            try:
+                await self._save_task
+            finally:
+                self._save_wakeup.clear()
+
+    async def _save_loop(self) -> None:
+        """后台保存循环，直到没有挂起的保存请求"""
+        while self._save_pending:
+            try:
+                await asyncio.wait_for(self._save_wakeup.wait(), self.autosave_delay)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # 事件循环关闭时仍写入最后一次保存，再继续传播取消
+                self._save_pending = False
+                await self._write_session()
+                raise
+            self._save_pending = False
+            await self._write_session()
+
+    async def _write_session(self) -> None:
+        """将当前会话写入文件"""
         try:
             # 确保目录存在
-            os.makedirs(os.path.dirname(self.session_file), exist_ok=True)
+            _ensure_dir(os.path.dirname(self.session_file))
 
+            # 在事件循环线程中复制可变状态，写入线程只访问快照
             session_data = {
                 "session_id": self.session_id,
                 "created_at": datetime.now().isoformat(),
-                "conversation_context": self.conversation_context,
-                "development_history": self.development_history,
-                "user_preferences": self.user_preferences,
+                "conversation_context": dict(self.conversation_context),
+                "user_preferences": dict(self.user_preferences),
                 "conversation_summary": self.get_conversation_summary(),
-                "messages": [msg.to_dict() for msg in self.messages],
                 "current_step": self.current_step,
                 "current_conversation_turn": self.current_conversation_turn
             }
 
-            with open(self.session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, ensure_ascii=False, indent=2)
+            await asyncio.to_thread(
+                _write_session_snapshot, self.session_file, session_data, list(self.messages)
+            )
 
             logger.info(f"💾 会话已保存: {self.session_file}")
 
@@ -326,17 +669,27 @@ class ConversationalSWEAgent(ToolCallAgent):
                 logger.warning(f"⚠️ 会话文件不存在: {session_file}")
                 return False
 
-            with open(session_file, 'r', encoding='utf-8') as f:
-                session_data = json.load(f)
+            session_data = await asyncio.to_thread(_read_session_file, session_file)
 
             # 恢复会话数据
             self.session_id = session_data.get("session_id")
             self.session_file = session_file
             self.conversation_context = session_data.get("conversation_context", {})
-            self.development_history = session_data.get("development_history", [])
+            if "development_history" in session_data:
+                # 旧版会话将开发历史内嵌在会话文件中，迁移到追加日志
+                history = session_data["development_history"]
+                if not os.path.exists(_history_log_path(session_file)):
+                    self._append_history_log(history)
+                self.development_history = deque(history, maxlen=self.max_history_records)
+                self._history_count = len(history)
+            else:
+                self.development_history, self._history_count = await asyncio.to_thread(
+                    _read_history_log, session_file, self.max_history_records
+                )
             self.user_preferences = session_data.get("user_preferences", {})
             self.current_step = session_data.get("current_step", 0)
             self.current_conversation_turn = session_data.get("current_conversation_turn", 0)
+            self._state_version += 1
 
             # 恢复消息历史
             if "messages" in session_data:
@@ -354,8 +707,31 @@ class ConversationalSWEAgent(ToolCallAgent):
             logger.error(f"❌ 加载会话失败: {e}")
             return False
 
-    def list_saved_sessions(self) -> List[Dict[str, Any]]:
-        """列出保存的会话"""
+    def list_saved_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """列出保存的会话，指定 limit 时只读取最近修改的 limit 个会话"""
+        sessions = []
+        conversations_dir = "conversations"
+
+        if not os.path.exists(conversations_dir):
+            return sessions
+
+        try:
+            for session_file in _list_session_files(conversations_dir, limit):
+                try:
+                    sessions.append(_session_info(session_file, _read_session_meta(session_file)))
+                except:
+                    continue
+
+            # 按创建时间排序
+            sessions.sort(key=lambda x: x["created_at"], reverse=True)
+
+        except Exception as e:
+            logger.error(f"❌ 列出会话失败: {e}")
+
+        return sessions
+
+    async def list_saved_sessions_async(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """list_saved_sessions 的异步版本，并发读取各会话的元数据，不阻塞事件循环"""
         sessions = []
         conversations_dir = "conversations"
 
@@ -363,23 +739,16 @@ class ConversationalSWEAgent(ToolCallAgent):
             return sessions
 
         try:
-            for filename in os.listdir(conversations_dir):
-                if filename.endswith('.json'):
-                    session_path = os.path.join(conversations_dir, filename)
-                    try:
-                        with open(session_path, 'r', encoding='utf-8') as f:
-                            session_data = json.load(f)
-
-                        sessions.append({
-                            "session_id": session_data.get("session_id"),
-                            "file_path": session_path,
-                            "created_at": session_data.get("created_at"),
-                            "conversation_turns": session_data.get("current_conversation_turn", 0),
-                            "steps": session_data.get("current_step", 0),
-                            "summary": session_data.get("conversation_summary", "")
-                        })
-                    except:
-                        continue
+            session_files = await asyncio.to_thread(_list_session_files, conversations_dir, limit)
+            results = await asyncio.gather(
+                *(asyncio.to_thread(_read_session_meta, session_file) for session_file in session_files),
+                return_exceptions=True
+            )
+            sessions = [
+                _session_info(session_file, session_data)
+                for session_file, session_data in zip(session_files, results)
+                if not isinstance(session_data, BaseException)
+            ]
 
             # 按创建时间排序
             sessions.sort(key=lambda x: x["created_at"], reverse=True)
@@ -391,16 +760,21 @@ class ConversationalSWEAgent(ToolCallAgent):
 
     async def start_new_conversation(self, user_input: str) -> str:
         """开始新的对话"""
+        # 先写入上一个会话挂起的保存，再切换会话文件
+        await self.flush_session()
+
         # 清理之前的状态
         self.conversation_context.clear()
         self.development_history.clear()
+        self._history_count = 0
+        self._state_version += 1
         self.pending_clarifications.clear()
         self.current_step = 0
         self.current_conversation_turn = 0
         self.memory.clear()
 
         # 生成新的会话ID
-        self.session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.session_id = _new_session_id()
         self.session_file = f"conversations/{self.session_id}.json"
 
         logger.info(f"🆕 开始新对话: {self.session_id}")
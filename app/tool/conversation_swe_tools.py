@@ -1,16 +1,217 @@
 """
 对话式软件开发专用工具集
 """
+import ast
+import asyncio
+import hashlib
+import heapq
 import json
 import os
-from typing import Any, Dict, List, Optional
+import re
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
 from datetime import datetime
 
+import aiofiles
+
 from app.tool.base import BaseTool
 from app.tool.str_replace_editor import StrReplaceEditor
 from app.tool.bash import Bash
 from app.logger import logger
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+
+def _dump_json(data: Any) -> bytes:
+    """将数据序列化为带缩进的 UTF-8 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _load_json(raw: bytes) -> Any:
+    """解析 JSON 字节串"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# 审查结果缓存：(文件路径, 审查重点, 内容哈希) -> 分析结果，超出容量时淘汰最早的条目
+_REVIEW_CACHE: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_REVIEW_CACHE_SIZE = 512
+
+
+def _build_review_scanner(long_lines: bool, keywords: List[str]) -> "re.Pattern":
+    """按审查重点生成逐行扫描的正则：匹配长行(>100字符)和以指定关键词开头的行"""
+    # 关键词之后必须还有非空白字符，与 line.strip().startswith(keyword) 的判断一致
+    keyword_re = "|".join(
+        re.escape(keyword) + (r"(?=[^\n]*\S)" if keyword.endswith(" ") else "")
+        for keyword in keywords
+    )
+    alternatives = []
+    if long_lines:
+        alternatives.append(rf"(?=[^\n]{{101}})(?P<long>)[^\S\n]*(?P<long_keyword>{keyword_re})?")
+    else:
+        alternatives.append("(?P<long>(?!))(?P<long_keyword>(?!))")
+    if keywords:
+        alternatives.append(rf"[^\S\n]*(?P<keyword>{keyword_re})")
+    else:
+        alternatives.append("(?P<keyword>(?!))")
+    return re.compile("^(?:" + "|".join(alternatives) + ")", re.MULTILINE)
+
+
+_COMMENT_KEYWORDS = ['#', '//']
+_LOOP_KEYWORDS = ['for ', 'while ']
+_DEF_KEYWORDS = ['def ', 'class ']
+_REVIEW_SCANNERS = {
+    "readability": _build_review_scanner(True, _COMMENT_KEYWORDS),
+    "performance": _build_review_scanner(False, _LOOP_KEYWORDS),
+    "architecture": _build_review_scanner(False, _DEF_KEYWORDS),
+    "all": _build_review_scanner(True, _COMMENT_KEYWORDS + _LOOP_KEYWORDS + _DEF_KEYWORDS),
+}
+# 不以空格或制表符开头的行（含空行）会重置循环嵌套深度
+_TOP_LEVEL_LINE_RE = re.compile(r"^(?![ \t])", re.MULTILINE)
+
+
+class _LoopNestingVisitor(ast.NodeVisitor):
+    """统计位于其他循环体内的循环数量"""
+
+    def __init__(self):
+        self.depth = 0
+        self.nested = 0
+
+    def _visit_loop(self, node: ast.AST) -> None:
+        self.depth += 1
+        if self.depth > 1:
+            self.nested += 1
+        self.generic_visit(node)
+        self.depth -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _visit_loop
+
+
+def _python_structure_stats(content: str, file_path: str) -> Optional[tuple]:
+    """解析Python源码，返回 (嵌套循环数, 长函数数)；无法解析时返回None"""
+    try:
+        tree = ast.parse(content, filename=file_path)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+    visitor = _LoopNestingVisitor()
+    visitor.visit(tree)
+    long_functions = sum(
+        1 for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.end_lineno - node.lineno > 50
+    )
+    return visitor.nested, long_functions
+
+
+# 需求澄清时总是会问的通用问题
+_GENERIC_QUESTIONS = (
+    {
+        "category": "项目背景",
+        "question": "这个项目的主要用户群体是谁？预期使用场景是什么？",
+        "why": "了解用户群体有助于做出更好的设计决策"
+    },
+    {
+        "category": "技术约束",
+        "question": "有什么技术限制或偏好吗？(编程语言、框架、部署环境等)",
+        "why": "技术约束会影响方案设计和实现方式"
+    },
+    {
+        "category": "项目范围",
+        "question": "项目的优先级如何？哪些功能是核心必须的，哪些是可选的？",
+        "why": "明确优先级有助于合理规划开发顺序和资源分配"
+    }
+)
+
+# 需求澄清报告固定的结尾
+_CLARIFICATION_NEXT_STEPS = (
+    "\n🎯 **建议的下一步**\n"
+    "1. 请回答上述问题，我将根据您的回答制定具体的技术方案\n"
+    "2. 如果需要，我可以帮您创建项目里程碑和任务分解\n"
+    "3. 确定技术方案后，我们可以开始具体的开发工作"
+)
+
+# 按秒缓存的时间戳：[(秒, ISO格式字符串)]，整体替换元组以保证读取一致
+_last_timestamp = [(0, "")]
+
+
+def _now_iso() -> str:
+    """返回当前时间的ISO格式字符串（精确到秒），同一秒内复用已格式化的结果"""
+    second = int(time.time())
+    cached_second, cached = _last_timestamp[0]
+    if cached_second != second:
+        cached = datetime.fromtimestamp(second).isoformat()
+        _last_timestamp[0] = (second, cached)
+    return cached
+
+
+# 报告中使用的状态图标
+_SEVERITY_EMOJI = {"high": "🔴", "medium": "🟡", "low": "🟢"}
+_STATUS_EMOJI = {"planning": "📋", "in_progress": "🚧", "completed": "✅"}
+
+# 进度数据累计多少次修改后自动写回磁盘
+_PROGRESS_FLUSH_INTERVAL = 100
+
+# 安全检查用的预编译正则，一次扫描完成匹配
+_SECRET_RE = re.compile(r'password|secret|key', re.IGNORECASE)
+_SQL_CALL_RE = re.compile(r'(?:execute|query)\(')
+_SQL_FORMAT_RE = re.compile(r'%s|\.format\(')
+
+
+# 需求分析用的关键词表
+_TECH_KEYWORDS = {
+    "web": ["网站", "web", "网页", "前端", "后端"],
+    "mobile": ["手机", "移动", "app", "安卓", "ios"],
+    "data": ["数据", "数据库", "分析", "统计", "报表"],
+    "ai": ["人工智能", "ai", "机器学习", "深度学习", "智能"],
+    "api": ["接口", "api", "服务", "调用"],
+    "game": ["游戏", "游戏开发", "unity", "引擎"]
+}
+_FUNCTIONAL_KEYWORDS = {
+    "user_management": ["用户", "登录", "注册", "账号"],
+    "data_processing": ["处理", "计算", "算法", "逻辑"],
+    "ui_ux": ["界面", "交互", "用户体验", "设计"],
+    "integration": ["集成", "对接", "连接", "同步"],
+    "automation": ["自动", "定时", "批处理", "任务"]
+}
+_AMBIGUOUS_INDICATORS = ("类似", "差不多", "简单的", "复杂的", "好看的", "高性能")
+_COMPLEXITY_INDICATORS = {
+    "simple": ["简单", "基础", "小", "demo"],
+    "complex": ["复杂", "高级", "大型", "企业级", "分布式", "微服务"]
+}
+
+
+def _build_keyword_index() -> Dict[str, frozenset]:
+    """建立 关键词 -> {(分组, 类别)} 的映射"""
+    hits: Dict[str, set] = {}
+    for group, table in (("tech", _TECH_KEYWORDS), ("functional", _FUNCTIONAL_KEYWORDS),
+                         ("complexity", _COMPLEXITY_INDICATORS)):
+        for category, keywords in table.items():
+            for keyword in keywords:
+                hits.setdefault(keyword, set()).add((group, category))
+    for indicator in _AMBIGUOUS_INDICATORS:
+        hits.setdefault(indicator, set()).add(("ambiguous", indicator))
+
+    # 关键词包含其他关键词时（如"用户体验"包含"用户"），命中前者同时意味着命中后者
+    return {
+        keyword: frozenset().union(*(hits[other] for other in hits if other in keyword))
+        for keyword in hits
+    }
+
+
+_KEYWORD_HITS = _build_keyword_index()
+# 前瞻匹配在每个位置取最长的关键词，一次扫描找出所有命中
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in sorted(_KEYWORD_HITS, key=len, reverse=True)) + "))"
+)
+
 
 class ConversationalCodeReview(BaseTool):
     """
@@ -51,14 +252,20 @@ class ConversationalCodeReview(BaseTool):
                 return f"❌ 文件不存在: {file_path}"
 
             # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+                content = await f.read()
 
             if not content.strip():
                 return f"📄 文件为空: {file_path}"
 
-            # 分析代码
-            review_result = self._analyze_code(content, file_path, review_focus)
+            # 分析代码（文件内容未变化时直接复用上次的分析结果）
+            cache_key = (file_path, review_focus, hashlib.sha256(content.encode()).hexdigest())
+            review_result = _REVIEW_CACHE.get(cache_key)
+            if review_result is None:
+                review_result = await asyncio.to_thread(self._analyze_code, content, file_path, review_focus)
+                _REVIEW_CACHE[cache_key] = review_result
+                if len(_REVIEW_CACHE) > _REVIEW_CACHE_SIZE:
+                    _REVIEW_CACHE.popitem(last=False)
 
             # 生成对话式审查报告
             report = self._generate_conversation_report(review_result, ask_questions)
@@ -71,12 +278,12 @@ class ConversationalCodeReview(BaseTool):
 
     def _analyze_code(self, content: str, file_path: str, focus: str) -> Dict[str, Any]:
         """分析代码质量"""
-        lines = content.split('\n')
+        line_count = content.count('\n') + 1
 
         analysis = {
             "file_info": {
                 "path": file_path,
-                "lines": len(lines),
+                "lines": line_count,
                 "size": len(content),
                 "extension": os.path.splitext(file_path)[1]
             },
@@ -86,62 +293,79 @@ class ConversationalCodeReview(BaseTool):
         }
 
         # 基础分析（简化版，实际应用中可集成静态分析工具）
-        if focus in ["readability", "all"]:
-            analysis = self._check_readability(content, lines, analysis)
-
-        if focus in ["performance", "all"]:
-            analysis = self._check_performance(content, lines, analysis)
-
-        if focus in ["security", "all"]:
-            analysis = self._check_security(content, lines, analysis)
-
-        if focus in ["architecture", "all"]:
-            analysis = self._check_architecture(content, lines, analysis)
-
-        return analysis
-
-    def _check_readability(self, content: str, lines: List[str], analysis: Dict) -> Dict:
-        """检查代码可读性"""
-        # 检查长行
-        long_lines = [(i+1, line) for i, line in enumerate(lines) if len(line) > 100]
-        if long_lines:
-            analysis["issues"].append({
-                "type": "readability",
-                "severity": "medium",
-                "message": f"发现 {len(long_lines)} 行超过100字符的长行",
-                "lines": [line_num for line_num, _ in long_lines[:3]]
-            })
-            analysis["questions"].append("这些长行是否可以通过重构来提高可读性？")
-
-        # 检查注释
-        comment_lines = [line for line in lines if line.strip().startswith('#') or line.strip().startswith('//')]
-        comment_ratio = len(comment_lines) / len(lines) if lines else 0
-
-        if comment_ratio < 0.1:
-            analysis["suggestions"].append({
-                "type": "readability",
-                "message": "建议增加代码注释，当前注释比例较低",
-                "action": "添加关键逻辑的注释说明"
-            })
-            analysis["questions"].append("哪些复杂的逻辑需要添加注释来帮助理解？")
-
+        self._scan(content, line_count, focus, analysis)
         return analysis
 
-    def _check_performance(self, content: str, lines: List[str], analysis: Dict) -> Dict:
-        """检查性能相关问题"""
-        # 检查循环嵌套
+    def _scan(self, content: str, line_count: int, focus: str, analysis: Dict) -> None:
+        """单次遍历所有行，同时收集可读性、性能和架构检查所需的统计"""
+        long_line_count = 0
+        long_line_numbers = []  # 只保留前3个长行的行号用于报告
+        comment_count = 0
         nested_loops = 0
-        loop_depth = 0
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith('for ') or stripped.startswith('while '):
-                loop_depth += 1
-                if loop_depth > 1:
+        prev_loop_start = None
+        long_function_count = 0
+        prev_def_line = None
+
+        # Python文件优先用语法树统计循环嵌套和函数长度，解析失败时退回逐行启发式
+        python_stats = None
+        if focus in ("performance", "architecture", "all") and analysis["file_info"]["extension"] == ".py":
+            python_stats = _python_structure_stats(content, analysis["file_info"]["path"])
+        scan_focus = focus
+        if python_stats is not None:
+            scan_focus = "readability" if focus == "all" else None
+
+        # 只有长行、注释、循环、定义这几类行会产生匹配，其余行在正则引擎内跳过
+        scanner = _REVIEW_SCANNERS.get(scan_focus)
+        line_no = 1
+        last_pos = 0
+        for match in scanner.finditer(content) if scanner else ():
+            start = match.start()
+            line_no += content.count('\n', last_pos, start)
+            last_pos = start
+            keyword = match.group("keyword") or match.group("long_keyword")
+
+            if match.group("long") is not None:
+                long_line_count += 1
+                if long_line_count <= 3:
+                    long_line_numbers.append(line_no)
+
+            if keyword in ('#', '//'):
+                comment_count += 1
+            elif keyword in ('for ', 'while '):
+                # 上一个循环行之后（含其本身）没有出现顶格行，说明仍处于循环体内
+                if prev_loop_start is not None and not _TOP_LEVEL_LINE_RE.search(content, prev_loop_start, start - 1):
                     nested_loops += 1
-            if not line.startswith(' ') and not line.startswith('\t'):
-                loop_depth = 0
+                prev_loop_start = start
+            elif keyword in ('def ', 'class '):
+                if prev_def_line is not None and line_no - prev_def_line - 1 > 50:
+                    long_function_count += 1
+                prev_def_line = line_no
 
-        if nested_loops > 0:
+        if python_stats is not None:
+            nested_loops, long_function_count = python_stats
+
+        # 检查代码可读性
+        if focus in ["readability", "all"]:
+            if long_line_count:
+                analysis["issues"].append({
+                    "type": "readability",
+                    "severity": "medium",
+                    "message": f"发现 {long_line_count} 行超过100字符的长行",
+                    "lines": long_line_numbers
+                })
+                analysis["questions"].append("这些长行是否可以通过重构来提高可读性？")
+
+            comment_ratio = comment_count / line_count
+            if comment_ratio < 0.1:
+                analysis["suggestions"].append({
+                    "type": "readability",
+                    "message": "建议增加代码注释，当前注释比例较低",
+                    "action": "添加关键逻辑的注释说明"
+                })
+                analysis["questions"].append("哪些复杂的逻辑需要添加注释来帮助理解？")
+
+        # 检查性能相关问题
+        if focus in ["performance", "all"] and nested_loops > 0:
             analysis["issues"].append({
                 "type": "performance",
                 "severity": "medium",
@@ -150,21 +374,30 @@ class ConversationalCodeReview(BaseTool):
             })
             analysis["questions"].append("这些嵌套循环是否可以通过更高效的算法来优化？")
 
-        return analysis
+        if focus in ["security", "all"]:
+            self._check_security(content, analysis)
 
-    def _check_security(self, content: str, lines: List[str], analysis: Dict) -> Dict:
+        # 检查架构问题：函数长度
+        if focus in ["architecture", "all"]:
+            if long_function_count:
+                analysis["suggestions"].append({
+                    "type": "architecture",
+                    "message": f"发现 {long_function_count} 个长函数(>50行)",
+                    "action": "考虑将长函数分解为更小的函数"
+                })
+                analysis["questions"].append("这些长函数是否承担了过多的职责？")
+
+    def _check_security(self, content: str, analysis: Dict) -> Dict:
         """检查安全问题"""
         security_risks = []
 
         # 检查SQL注入风险
-        if 'execute(' in content or 'query(' in content:
-            if '%s' in content or '.format(' in content:
-                security_risks.append("可能存在SQL注入风险")
+        if _SQL_CALL_RE.search(content) and _SQL_FORMAT_RE.search(content):
+            security_risks.append("可能存在SQL注入风险")
 
         # 检查硬编码密码
-        if any(keyword in content.lower() for keyword in ['password', 'secret', 'key']):
-            if '=' in content:
-                security_risks.append("可能存在硬编码敏感信息")
+        if _SECRET_RE.search(content) and '=' in content:
+            security_risks.append("可能存在硬编码敏感信息")
 
         if security_risks:
             analysis["issues"].extend([{
@@ -176,76 +409,52 @@ class ConversationalCodeReview(BaseTool):
 
         return analysis
 
-    def _check_architecture(self, content: str, lines: List[str], analysis: Dict) -> Dict:
-        """检查架构问题"""
-        # 检查函数长度
-        function_lines = []
-        current_function_lines = 0
-        in_function = False
-
-        for line in lines:
-            if line.strip().startswith('def ') or line.strip().startswith('class '):
-                if in_function and current_function_lines > 0:
-                    function_lines.append(current_function_lines)
-                in_function = True
-                current_function_lines = 0
-            elif in_function:
-                current_function_lines += 1
-
-        long_functions = [length for length in function_lines if length > 50]
-        if long_functions:
-            analysis["suggestions"].append({
-                "type": "architecture",
-                "message": f"发现 {len(long_functions)} 个长函数(>50行)",
-                "action": "考虑将长函数分解为更小的函数"
-            })
-            analysis["questions"].append("这些长函数是否承担了过多的职责？")
-
-        return analysis
-
     def _generate_conversation_report(self, analysis: Dict, ask_questions: bool) -> str:
         """生成对话式审查报告"""
         report_parts = []
 
-        # 文件基本信息
         file_info = analysis["file_info"]
-        report_parts.append(f"📊 **文件概览**")
-        report_parts.append(f"- 文件: {file_info['path']}")
-        report_parts.append(f"- 行数: {file_info['lines']}")
-        report_parts.append(f"- 大小: {file_info['size']} 字符")
+        issues = analysis["issues"]
+        suggestions = analysis["suggestions"]
+        questions = analysis["questions"]
+        append = report_parts.append
+
+        # 文件基本信息
+        append(
+            f"📊 **文件概览**\n"
+            f"- 文件: {file_info['path']}\n"
+            f"- 行数: {file_info['lines']}\n"
+            f"- 大小: {file_info['size']} 字符"
+        )
 
         # 问题报告
-        if analysis["issues"]:
-            report_parts.append(f"\n⚠️  **发现的问题** ({len(analysis['issues'])}个)")
-            for issue in analysis["issues"]:
-                severity_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(issue["severity"], "⚪")
-                report_parts.append(f"{severity_emoji} {issue['message']}")
+        if issues:
+            append(f"\n⚠️  **发现的问题** ({len(issues)}个)")
+            for issue in issues:
+                append(f"{_SEVERITY_EMOJI.get(issue['severity'], '⚪')} {issue['message']}")
                 if "lines" in issue:
-                    report_parts.append(f"   位置: 第 {', '.join(map(str, issue['lines']))} 行")
+                    append(f"   位置: 第 {', '.join(map(str, issue['lines']))} 行")
 
         # 改进建议
-        if analysis["suggestions"]:
-            report_parts.append(f"\n💡 **改进建议** ({len(analysis['suggestions'])}个)")
-            for suggestion in analysis["suggestions"]:
-                report_parts.append(f"• {suggestion['message']}")
+        if suggestions:
+            append(f"\n💡 **改进建议** ({len(suggestions)}个)")
+            for suggestion in suggestions:
+                append(f"• {suggestion['message']}")
                 if "action" in suggestion:
-                    report_parts.append(f"  建议行动: {suggestion['action']}")
+                    append(f"  建议行动: {suggestion['action']}")
 
         # 思考问题
-        if ask_questions and analysis["questions"]:
-            report_parts.append(f"\n🤔 **思考问题**")
-            for i, question in enumerate(analysis["questions"], 1):
-                report_parts.append(f"{i}. {question}")
-            report_parts.append("\n💬 请回答上述问题，我将根据您的回答提供更具体的建议。")
+        if ask_questions and questions:
+            append("\n🤔 **思考问题**")
+            report_parts.extend(f"{i}. {question}" for i, question in enumerate(questions, 1))
+            append("\n💬 请回答上述问题，我将根据您的回答提供更具体的建议。")
 
         # 总结
-        if not analysis["issues"] and not analysis["suggestions"]:
-            report_parts.append(f"\n✅ **总结**: 代码质量良好，未发现明显问题！")
+        if not issues and not suggestions:
+            append("\n✅ **总结**: 代码质量良好，未发现明显问题！")
         else:
-            issue_count = len(analysis["issues"])
-            suggestion_count = len(analysis["suggestions"])
-            report_parts.append(f"\n📋 **总结**: 发现 {issue_count} 个问题，{suggestion_count} 个改进建议")
-            report_parts.append("建议优先处理高优先级问题，然后考虑改进建议。")
+            append(f"\n📋 **总结**: 发现 {len(issues)} 个问题，{len(suggestions)} 个改进建议")
+            append("建议优先处理高优先级问题，然后考虑改进建议。")
 
         return "\n".join(report_parts)
 
@@ -255,9 +464,25 @@ class ProjectProgressTracker(BaseTool):
     项目进度跟踪工具
     """
     progress_file: str = "project_progress.json"
+
+    # 以下为实例状态，跟踪器不能在智能体间共享，每个智能体各自创建一个
+    # 已解析的进度数据及对应的文件状态 (st_mtime_ns, st_size)，文件未变化时跳过重新解析
+    _data: Optional[Dict] = None
+    _data_stamp: Optional[tuple] = None
+    # 内存中的修改尚未写回磁盘
+    _dirty: bool = False
+    _op_count: int = 0
+    # 任务与里程碑的哈希索引，同名时保留第一个（与按顺序查找的结果一致）
+    _tasks_by_id: Dict[int, Dict] = {}
+    _tasks_by_name: Dict[str, Dict] = {}
+    _milestone_by_name: Dict[str, Dict] = {}
+    _milestone_by_task_id: Dict[int, Dict] = {}
+    # 最近完成的3个任务，最新的在右端
+    _recent: deque = deque(maxlen=3)
+    # 所有里程碑进度之和，用于增量计算整体进度
+    _progress_sum: int = 0
     
     def __init__(self, **kwargs):
-        print("Initializing ProjectProgressTracker...")
         super().__init__(
             name="project_progress_tracker",
             description="跟踪和管理软件开发项目的进度",
@@ -267,7 +492,7 @@ class ProjectProgressTracker(BaseTool):
                     "action": {
                         "type": "string",
                         "description": "操作类型",
-                        "enum": ["create_milestone", "update_progress", "list_milestones", "add_task", "complete_task", "show_summary"]
+                        "enum": ["create_milestone", "update_progress", "list_milestones", "add_task", "complete_task", "show_summary", "flush"]
                     },
                     "milestone_name": {
                         "type": "string",
@@ -292,13 +517,11 @@ class ProjectProgressTracker(BaseTool):
             },
             **kwargs
         )
-        print("already")
-
 
     async def execute(self, action: str, **kwargs) -> str:
         """执行进度跟踪操作"""
         try:
-            progress_data = self._load_progress_data()
+            progress_data = await asyncio.to_thread(self._load_progress_data)
 
             if action == "create_milestone":
                 return await self._create_milestone(progress_data, kwargs)
@@ -312,6 +535,8 @@ class ProjectProgressTracker(BaseTool):
                 return await self._complete_task(progress_data, kwargs)
             elif action == "show_summary":
                 return await self._show_summary(progress_data)
+            elif action == "flush":
+                return await self._flush()
             else:
                 return f"❌ 未知操作: {action}"
 
@@ -319,28 +544,103 @@ class ProjectProgressTracker(BaseTool):
             logger.error(f"进度跟踪出错: {e}")
             return f"❌ 操作失败: {str(e)}"
 
+    def _file_stamp(self) -> Optional[tuple]:
+        """获取进度文件的状态标记，文件不存在时返回None"""
+        try:
+            stat = os.stat(self.progress_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def _load_progress_data(self) -> Dict:
         """加载进度数据"""
-        if os.path.exists(self.progress_file):
+        if self._dirty:
+            return self._data
+
+        stamp = self._file_stamp()
+        if self._data is not None and stamp == self._data_stamp:
+            return self._data
+
+        data = None
+        if stamp is not None:
             try:
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.progress_file, 'rb') as f:
+                    data = _load_json(f.read())
             except:
                 pass
 
-        # 默认数据结构
-        return {
-            "project_name": "软件开发项目",
-            "created_at": datetime.now().isoformat(),
-            "milestones": [],
-            "tasks": [],
-            "overall_progress": 0
-        }
+        if data is None:
+            # 默认数据结构
+            data = {
+                "project_name": "软件开发项目",
+                "created_at": _now_iso(),
+                "milestones": [],
+                "tasks": [],
+                "overall_progress": 0
+            }
+
+        self._data = data
+        self._data_stamp = stamp
+        self._build_indices(data)
+        return data
+
+    def _build_indices(self, data: Dict) -> None:
+        """根据进度数据重建任务和里程碑索引"""
+        self._tasks_by_id = {}
+        self._tasks_by_name = {}
+        self._milestone_by_name = {}
+        self._milestone_by_task_id = {}
+        for task in data["tasks"]:
+            self._tasks_by_id.setdefault(task["id"], task)
+            self._tasks_by_name.setdefault(task["name"], task)
+        for milestone in data["milestones"]:
+            self._milestone_by_name.setdefault(milestone["name"], milestone)
+            # 重新统计任务数，兼容没有计数字段的旧进度文件
+            milestone["total_count"] = len(milestone["tasks"])
+            milestone["completed_count"] = 0
+            for task_id in milestone["tasks"]:
+                self._milestone_by_task_id.setdefault(task_id, milestone)
+                task = self._tasks_by_id.get(task_id)
+                if task is not None and task["status"] == "completed":
+                    milestone["completed_count"] += 1
+        self._progress_sum = sum(milestone["progress"] for milestone in data["milestones"])
+
+        recent_tasks = heapq.nlargest(
+            3,
+            (t for t in data["tasks"] if t.get("completed_at")),
+            key=lambda x: x["completed_at"]
+        )
+        self._recent = deque(reversed(recent_tasks), maxlen=3)
 
     def _save_progress_data(self, data: Dict) -> None:
-        """保存进度数据"""
-        with open(self.progress_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """保存进度数据（先写临时文件再原子替换，避免写入中断导致文件损坏）"""
+        tmp_file = f"{self.progress_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(_dump_json(data))
+        os.replace(tmp_file, self.progress_file)
+        self._data = data
+        self._data_stamp = self._file_stamp()
+        self._dirty = False
+
+    async def _mark_dirty(self, data: Dict) -> None:
+        """记录一次修改，累计到一定次数后批量写回磁盘"""
+        self._data = data
+        self._dirty = True
+        self._op_count += 1
+        if self._op_count % _PROGRESS_FLUSH_INTERVAL == 0:
+            await asyncio.to_thread(self._save_progress_data, data)
+
+    async def _flush(self) -> str:
+        """立即将未保存的修改写回磁盘"""
+        if not self._dirty:
+            return "💾 进度数据已是最新，无需保存"
+        await asyncio.to_thread(self._save_progress_data, self._data)
+        return f"💾 进度数据已保存到 {self.progress_file}"
+
+    async def cleanup(self) -> None:
+        """释放工具前写回未保存的修改"""
+        if self._dirty:
+            await asyncio.to_thread(self._save_progress_data, self._data)
 
     async def _create_milestone(self, data: Dict, kwargs: Dict) -> str:
         """创建里程碑"""
@@ -354,14 +654,18 @@ class ProjectProgressTracker(BaseTool):
             "id": len(data["milestones"]) + 1,
             "name": milestone_name,
             "description": description,
-            "created_at": datetime.now().isoformat(),
+            "created_at": _now_iso(),
             "progress": 0,
             "status": "planning",
-            "tasks": []
+            "tasks": [],
+            "completed_count": 0,
+            "total_count": 0
         }
 
         data["milestones"].append(milestone)
-        self._save_progress_data(data)
+        self._milestone_by_name.setdefault(milestone_name, milestone)
+        self._update_overall_progress(data)
+        await self._mark_dirty(data)
 
         return f"✅ 成功创建里程碑: {milestone_name}\n📝 描述: {description}"
 
@@ -379,21 +683,25 @@ class ProjectProgressTracker(BaseTool):
             "name": task_name,
             "description": description,
             "milestone": milestone_name,
-            "created_at": datetime.now().isoformat(),
+            "created_at": _now_iso(),
             "status": "todo",
             "completed_at": None
         }
 
         data["tasks"].append(task)
+        self._tasks_by_id.setdefault(task["id"], task)
+        self._tasks_by_name.setdefault(task_name, task)
 
         # 如果指定了里程碑，也添加到里程碑的任务列表
         if milestone_name:
-            for milestone in data["milestones"]:
-                if milestone["name"] == milestone_name:
-                    milestone["tasks"].append(task["id"])
-                    break
+            milestone = self._milestone_by_name.get(milestone_name)
+            if milestone is not None:
+                milestone["tasks"].append(task["id"])
+                milestone["total_count"] += 1
+                self._milestone_by_task_id.setdefault(task["id"], milestone)
+                self._update_milestone_progress(data, milestone)
 
-        self._save_progress_data(data)
+        await self._mark_dirty(data)
 
         return f"✅ 成功添加任务: {task_name}\n📋 关联里程碑: {milestone_name or '无'}"
 
@@ -404,57 +712,63 @@ class ProjectProgressTracker(BaseTool):
         if not task_name:
             return "❌ 请提供任务名称"
 
-        task_found = False
-        for task in data["tasks"]:
-            if task["name"] == task_name:
-                task["status"] = "completed"
-                task["completed_at"] = datetime.now().isoformat()
-                task_found = True
-                break
-
-        if not task_found:
+        task = self._tasks_by_name.get(task_name)
+        if task is None:
             return f"❌ 未找到任务: {task_name}"
 
+        milestone = self._milestone_by_task_id.get(task["id"])
+        if task["status"] != "completed":
+            task["status"] = "completed"
+            if milestone is not None:
+                milestone["completed_count"] += 1
+        task["completed_at"] = _now_iso()
+
+        if any(recent is task for recent in self._recent):
+            self._recent.remove(task)
+        self._recent.append(task)
+
         # 更新相关里程碑进度
-        self._update_milestone_progress(data)
-        self._save_progress_data(data)
+        if milestone is not None:
+            self._update_milestone_progress(data, milestone)
+        await self._mark_dirty(data)
 
         return f"🎉 任务完成: {task_name}"
 
-    def _update_milestone_progress(self, data: Dict) -> None:
-        """更新里程碑进度"""
-        for milestone in data["milestones"]:
-            if milestone["tasks"]:
-                completed_tasks = sum(
-                    1 for task in data["tasks"]
-                    if task["id"] in milestone["tasks"] and task["status"] == "completed"
-                )
-                total_tasks = len(milestone["tasks"])
-                milestone["progress"] = int((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
-
-                if milestone["progress"] == 100:
-                    milestone["status"] = "completed"
-                elif milestone["progress"] > 0:
-                    milestone["status"] = "in_progress"
-
-        # 更新整体进度
+    def _update_milestone_progress(self, data: Dict, milestone: Dict) -> None:
+        """更新单个里程碑的进度"""
+        total_tasks = milestone["total_count"]
+        if total_tasks:
+            progress = milestone["completed_count"] * 100 // total_tasks
+            self._progress_sum += progress - milestone["progress"]
+            milestone["progress"] = progress
+
+            if progress == 100:
+                milestone["status"] = "completed"
+            elif progress > 0:
+                milestone["status"] = "in_progress"
+
+        self._update_overall_progress(data)
+
+    def _update_overall_progress(self, data: Dict) -> None:
+        """根据里程碑进度之和更新整体进度"""
         if data["milestones"]:
-            total_progress = sum(milestone["progress"] for milestone in data["milestones"])
-            data["overall_progress"] = int(total_progress / len(data["milestones"]))
+            data["overall_progress"] = self._progress_sum // len(data["milestones"])
 
     async def _show_summary(self, data: Dict) -> str:
         """显示项目总结"""
         summary_parts = []
 
-        summary_parts.append(f"📊 **{data['project_name']} 进度总结**")
-        summary_parts.append(f"🎯 整体进度: {data['overall_progress']}%")
-        summary_parts.append(f"📅 创建时间: {data['created_at'][:10]}")
+        summary_parts.append(
+            f"📊 **{data['project_name']} 进度总结**\n"
+            f"🎯 整体进度: {data['overall_progress']}%\n"
+            f"📅 创建时间: {data['created_at'][:10]}"
+        )
 
         # 里程碑统计
         milestones = data["milestones"]
         if milestones:
-            completed_milestones = len([m for m in milestones if m["status"] == "completed"])
-            in_progress_milestones = len([m for m in milestones if m["status"] == "in_progress"])
+            completed_milestones = sum(1 for m in milestones if m["status"] == "completed")
+            in_progress_milestones = sum(1 for m in milestones if m["status"] == "in_progress")
 
             summary_parts.append(f"\n🎯 **里程碑概览** (总共 {len(milestones)} 个)")
             summary_parts.append(f"✅ 已完成: {completed_milestones}")
@@ -464,23 +778,17 @@ class ProjectProgressTracker(BaseTool):
         # 任务统计
         tasks = data["tasks"]
         if tasks:
-            completed_tasks = len([t for t in tasks if t["status"] == "completed"])
+            completed_tasks = sum(1 for t in tasks if t["status"] == "completed")
             summary_parts.append(f"\n📝 **任务概览** (总共 {len(tasks)} 个)")
             summary_parts.append(f"✅ 已完成: {completed_tasks}")
             summary_parts.append(f"📋 待完成: {len(tasks) - completed_tasks}")
 
         # 最近活动
-        recent_tasks = sorted(
-            [t for t in tasks if t.get("completed_at")],
-            key=lambda x: x["completed_at"],
-            reverse=True
-        )[:3]
-
-        if recent_tasks:
-            summary_parts.append(f"\n🕒 **最近完成的任务**")
-            for task in recent_tasks:
-                completed_date = task["completed_at"][:10]
-                summary_parts.append(f"• {task['name']} ({completed_date})")
+        if self._recent:
+            summary_parts.append("\n🕒 **最近完成的任务**")
+            summary_parts.extend(
+                f"• {task['name']} ({task['completed_at'][:10]})" for task in reversed(self._recent)
+            )
 
         return "\n".join(summary_parts)
 
@@ -493,25 +801,17 @@ class ProjectProgressTracker(BaseTool):
 
         milestone_list = [f"🎯 **项目里程碑** (共 {len(milestones)} 个)"]
 
+        append = milestone_list.append
         for milestone in milestones:
-            status_emoji = {
-                "planning": "📋",
-                "in_progress": "🚧",
-                "completed": "✅"
-            }.get(milestone["status"], "❓")
+            status_emoji = _STATUS_EMOJI.get(milestone["status"], "❓")
 
-            milestone_list.append(f"\n{status_emoji} **{milestone['name']}** ({milestone['progress']}%)")
+            append(f"\n{status_emoji} **{milestone['name']}** ({milestone['progress']}%)")
             if milestone["description"]:
-                milestone_list.append(f"   📝 {milestone['description']}")
+                append(f"   📝 {milestone['description']}")
 
             # 显示关联任务
-            milestone_tasks = [
-                task for task in data["tasks"]
-                if task["id"] in milestone.get("tasks", [])
-            ]
-            if milestone_tasks:
-                completed_count = len([t for t in milestone_tasks if t["status"] == "completed"])
-                milestone_list.append(f"   📊 任务进度: {completed_count}/{len(milestone_tasks)}")
+            if milestone["total_count"]:
+                append(f"   📊 任务进度: {milestone['completed_count']}/{milestone['total_count']}")
 
         return "\n".join(milestone_list)
 
@@ -563,8 +863,6 @@ class RequirementClarifier(BaseTool):
 
     def _analyze_requirement(self, requirement: str, depth: str) -> Dict[str, Any]:
         """分析用户需求"""
-        words = requirement.lower().split()
-
         analysis = {
             "original_requirement": requirement,
             "key_concepts": [],
@@ -575,114 +873,78 @@ class RequirementClarifier(BaseTool):
             "complexity_level": "medium"
         }
 
-        # 识别关键概念
-        tech_keywords = {
-            "web": ["网站", "web", "网页", "前端", "后端"],
-            "mobile": ["手机", "移动", "app", "安卓", "ios"],
-            "data": ["数据", "数据库", "分析", "统计", "报表"],
-            "ai": ["人工智能", "ai", "机器学习", "深度学习", "智能"],
-            "api": ["接口", "api", "服务", "调用"],
-            "game": ["游戏", "游戏开发", "unity", "引擎"]
-        }
+        # 一次扫描收集所有关键词命中
+        hits = set()
+        for match in _KEYWORD_RE.finditer(requirement):
+            hits |= _KEYWORD_HITS[match.group(1)]
 
-        for category, keywords in tech_keywords.items():
-            if any(keyword in requirement for keyword in keywords):
-                analysis["technology_hints"].append(category)
+        # 识别关键概念
+        analysis["technology_hints"] = [c for c in _TECH_KEYWORDS if ("tech", c) in hits]
 
         # 识别功能领域
-        functional_keywords = {
-            "user_management": ["用户", "登录", "注册", "账号"],
-            "data_processing": ["处理", "计算", "算法", "逻辑"],
-            "ui_ux": ["界面", "交互", "用户体验", "设计"],
-            "integration": ["集成", "对接", "连接", "同步"],
-            "automation": ["自动", "定时", "批处理", "任务"]
-        }
-
-        for area, keywords in functional_keywords.items():
-            if any(keyword in requirement for keyword in keywords):
-                analysis["functional_areas"].append(area)
+        analysis["functional_areas"] = [a for a in _FUNCTIONAL_KEYWORDS if ("functional", a) in hits]
 
         # 检测模糊部分
-        ambiguous_indicators = ["类似", "差不多", "简单的", "复杂的", "好看的", "高性能"]
-        for indicator in ambiguous_indicators:
-            if indicator in requirement:
-                analysis["ambiguous_parts"].append(f"'{indicator}' 需要更具体的定义")
+        analysis["ambiguous_parts"] = [
+            f"'{indicator}' 需要更具体的定义"
+            for indicator in _AMBIGUOUS_INDICATORS
+            if ("ambiguous", indicator) in hits
+        ]
 
         # 评估复杂度
-        complexity_indicators = {
-            "simple": ["简单", "基础", "小", "demo"],
-            "complex": ["复杂", "高级", "大型", "企业级", "分布式", "微服务"]
-        }
-
-        if any(word in requirement for word in complexity_indicators["simple"]):
+        if ("complexity", "simple") in hits:
             analysis["complexity_level"] = "simple"
-        elif any(word in requirement for word in complexity_indicators["complex"]):
+        elif ("complexity", "complex") in hits:
             analysis["complexity_level"] = "complex"
 
         return analysis
 
     def _generate_clarification_questions(self, analysis: Dict) -> List[Dict[str, str]]:
         """生成澄清问题"""
-        questions = []
+        return list(islice(self._iter_clarification_questions(analysis), 6))  # 限制问题数量，避免过多
 
+    def _iter_clarification_questions(self, analysis: Dict) -> Iterator[Dict[str, str]]:
+        """按优先级依次产出澄清问题，调用方取够数量后不再构建后续问题"""
         # 基于技术方向的问题
         if "web" in analysis["technology_hints"]:
-            questions.append({
+            yield {
                 "category": "技术选型",
                 "question": "您希望开发什么类型的Web应用？(静态网站、动态Web应用、SPA单页应用)",
                 "why": "不同类型的Web应用需要不同的技术栈和架构设计"
-            })
+            }
 
         if "mobile" in analysis["technology_hints"]:
-            questions.append({
+            yield {
                 "category": "平台选择",
                 "question": "您希望支持哪些移动平台？(iOS、Android、还是跨平台)",
                 "why": "平台选择会影响开发工具和技术栈的选择"
-            })
+            }
 
         # 基于功能领域的问题
         if "user_management" in analysis["functional_areas"]:
-            questions.append({
+            yield {
                 "category": "用户管理",
                 "question": "用户管理需要哪些具体功能？(注册方式、权限等级、个人资料等)",
                 "why": "用户管理的复杂程度会影响数据库设计和安全架构"
-            })
+            }
 
         if "data_processing" in analysis["functional_areas"]:
-            questions.append({
+            yield {
                 "category": "数据处理",
                 "question": "需要处理什么类型的数据？数据量大概有多少？",
                 "why": "数据类型和规模会影响存储方案和处理架构的选择"
-            })
+            }
 
         # 基于模糊部分的问题
         if analysis["ambiguous_parts"]:
-            questions.append({
+            yield {
                 "category": "需求澄清",
                 "question": "能否具体说明以下表述？" + "、".join(analysis["ambiguous_parts"]),
                 "why": "明确需求细节有助于准确估算工作量和选择合适方案"
-            })
-
-        # 通用问题
-        questions.extend([
-            {
-                "category": "项目背景",
-                "question": "这个项目的主要用户群体是谁？预期使用场景是什么？",
-                "why": "了解用户群体有助于做出更好的设计决策"
-            },
-            {
-                "category": "技术约束",
-                "question": "有什么技术限制或偏好吗？(编程语言、框架、部署环境等)",
-                "why": "技术约束会影响方案设计和实现方式"
-            },
-            {
-                "category": "项目范围",
-                "question": "项目的优先级如何？哪些功能是核心必须的，哪些是可选的？",
-                "why": "明确优先级有助于合理规划开发顺序和资源分配"
             }
-        ])
 
-        return questions[:6]  # 限制问题数量，避免过多
+        # 通用问题
+        yield from _GENERIC_QUESTIONS
 
     def _generate_clarification_report(self, analysis: Dict, questions: List[Dict]) -> str:
         """生成澄清报告"""
@@ -703,15 +965,12 @@ class RequirementClarifier(BaseTool):
         # 澄清问题
         report_parts.append(f"\n❓ **需要澄清的问题** (共{len(questions)}个)")
 
-        for i, q in enumerate(questions, 1):
-            report_parts.append(f"\n**问题 {i}: {q['category']}**")
-            report_parts.append(f"🤔 {q['question']}")
-            report_parts.append(f"💡 原因: {q['why']}")
+        report_parts.extend(
+            f"\n**问题 {i}: {q['category']}**\n🤔 {q['question']}\n💡 原因: {q['why']}"
+            for i, q in enumerate(questions, 1)
+        )
 
         # 下一步建议
-        report_parts.append(f"\n🎯 **建议的下一步**")
-        report_parts.append("1. 请回答上述问题，我将根据您的回答制定具体的技术方案")
-        report_parts.append("2. 如果需要，我可以帮您创建项目里程碑和任务分解")
-        report_parts.append("3. 确定技术方案后，我们可以开始具体的开发工作")
+        report_parts.append(_CLARIFICATION_NEXT_STEPS)
 
         return "\n".join(report_parts)
@@ -1,22 +1,29 @@
-from functools import cache
+from collections import deque
+from math import inf
+
+
 def resolution(matrix):
     n , m = len(matrix) , len(matrix[0])
-    @cache
-    def dfs(i , j) :
-        if i < 0 or j < 0 or i >= n or j >= m or matrix[i][j] == 2 :
-            return inf
-        if matrix[i][j] == 0:
-            return 0
-        matrix[i][j] == 2
-        return min(dfs(i - 1 , j) + 1 , dfs(i + 1,j) + 1, dfs(i ,j + 1) +  1 , dfs(i , j - 1) + 1)
-
-    ma = [[0] * n] * m
+    dist = [[inf] * m for _ in range(n)]
 
+    # 从所有0格子出发做多源BFS，2为障碍物
+    q = deque()
     for i in range(n) :
         for j in range(m) :
-            ma[i][j] = dfs(i , j)
+            if matrix[i][j] == 0 :
+                dist[i][j] = 0
+                q.append((i , j))
+
+    while q :
+        i , j = q.popleft()
+        d = dist[i][j] + 1
+        for ni , nj in ((i - 1 , j) , (i + 1 , j) , (i , j - 1) , (i , j + 1)) :
+            if 0 <= ni < n and 0 <= nj < m and matrix[ni][nj] != 2 and dist[ni][nj] > d :
+                dist[ni][nj] = d
+                q.append((ni , nj))
+
+    return dist
 
-    return ma
 
-input = [[0,0,0] , [0,1,0],[0,0,0]]
-print(resolution(input))
+if __name__ == "__main__":
+    print(resolution([[0,0,0] , [0,1,0],[0,0,0]]))
@@ -17,112 +17,356 @@
     python run_conversational_swe.py --list             # 列出所有保存的会话
 """
 
-import argparse
 import asyncio
+import contextlib
+import functools
+import select
+import signal
 import sys
-from typing import Optional
-from app.agent.conversational_swe import ConversationalSWEAgent
-from app.logger import logger
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
 
+# 智能体会加载LLM客户端、工具和配置，只在真正需要时导入，使 --help 等快速返回
+if TYPE_CHECKING:
+    from app.agent.conversational_swe import ConversationalSWEAgent
 
-async def interactive_mode(agent: ConversationalSWEAgent, initial_prompt: Optional[str] = None):
+try:
+    import uvloop
+except ImportError:  # uvloop 为可选依赖，Windows 上不可用，缺失时使用默认事件循环
+    uvloop = None
+
+
+# 等待输入期间收到 SIGINT 时设置，由 _sigint_sets_shutdown 注册
+_shutdown = asyncio.Event()
+
+# 进行中的读取；读取线程无法取消，被取消的等待会把读到的行留给下一次读取
+_pending_read: Optional[asyncio.Future] = None
+
+
+@contextlib.contextmanager
+def _sigint_sets_shutdown():
+    """等待输入期间将 SIGINT 转为设置 _shutdown 事件，退出时恢复原有处理器
+
+    事件循环的信号处理器要等循环取回控制权才会执行，因此只在空闲等待输入时安装；
+    智能体执行步骤时保留原有处理器，同步阻塞的调用（如 ask_human 的 input()）仍能被中断。
+    不支持的平台（如Windows）始终使用原有处理器
+    """
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGINT)
+    try:
+        loop.add_signal_handler(signal.SIGINT, _shutdown.set)
+        installed = True
+    except (NotImplementedError, RuntimeError, ValueError):
+        installed = False
+
+    try:
+        yield
+    finally:
+        if installed:
+            loop.remove_signal_handler(signal.SIGINT)
+            signal.signal(signal.SIGINT, previous)
+
+
+async def _interruptible(aw):
+    """等待 aw 完成；期间收到中断信号时取消它并抛出 KeyboardInterrupt，与默认的中断行为一致"""
+    task = asyncio.ensure_future(aw)
+    stop = asyncio.create_task(_shutdown.wait())
+    try:
+        done, _ = await asyncio.wait((task, stop), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stop.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    if task not in done:
+        raise KeyboardInterrupt
+    return task.result()
+
+
+def _start_read_thread() -> asyncio.Future:
+    """在守护线程中阻塞读取一行，结果通过 future 交回事件循环
+
+    经由 sys.stdin 读取，与 ask_human 等工具中的 input() 共用同一缓冲区，管道中多读的行不会丢失。
+
+    stdin 不接入事件循环：那样会把与 stdout 共享的描述符设为非阻塞，
+    并使 ask_human 等工具中的 input() 无法再读取。也不使用默认线程池，
+    其线程在退出时会被等待，尚未完成的读取会阻止进程退出
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def deliver(line: Optional[str], error: Optional[BaseException]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+
+    def worker() -> None:
+        try:
+            result = (sys.stdin.readline(), None)
+        except Exception as e:
+            result = (None, e)
+        try:
+            loop.call_soon_threadsafe(deliver, *result)
+        except RuntimeError:  # 事件循环已关闭
+            pass
+
+    threading.Thread(target=worker, name="stdin-reader", daemon=True).start()
+    return future
+
+
+async def _read_line() -> str:
+    """读取一行原始输入，等待被取消时不会丢失已读到的行"""
+    global _pending_read
+    if _pending_read is None:
+        _pending_read = _start_read_thread()
+    line = await asyncio.shield(_pending_read)
+    _pending_read = None
+    return line
+
+
+async def ainput(prompt: str = "") -> str:
+    """异步读取一行输入，等待用户输入期间事件循环中的其他任务可以继续运行"""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+
+    with _sigint_sets_shutdown():
+        line = await _interruptible(_read_line())
+
+    if not line:
+        raise EOFError
+    return line.rstrip("\r\n")
+
+
+def _stdin_isatty() -> bool:
+    """标准输入是否为终端"""
+    try:
+        return sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _stdin_ready() -> bool:
+    """标准输入中是否已有可立即读取的行，不等待；不支持 select 的平台（如Windows）返回False"""
+    try:
+        return bool(select.select([sys.stdin], [], [], 0)[0])
+    except (OSError, ValueError, TypeError):
+        return False
+
+
+async def ainput_lines(prompt: str = "", max_lines: int = 8) -> List[str]:
+    """读取一行输入，并合并紧随其后已经到达的行（如粘贴的多行文本），最多 max_lines 行
+
+    只合并读取时已在终端缓冲中的行，不额外等待；管道输入视为脚本，每行单独处理
+    """
+    if not _stdin_isatty():
+        return [await ainput(prompt)]
+
+    lines = [await ainput(prompt)]
+    # 终端按行交付输入，可读时下一行已完整到达，同步读取不会阻塞
+    while len(lines) < max_lines and _stdin_ready():
+        line = sys.stdin.readline()
+        if not line:  # EOF，下一次读取时再抛出 EOFError
+            break
+        lines.append(line.rstrip("\r\n"))
+    return lines
+
+
+# 演示场景：(编号, 标题, 需求描述)
+_SCENARIOS = (
+    ("1", "Web应用开发", "我想开发一个简单的博客网站，用户可以发布文章和评论"),
+    ("2", "数据分析工具", "需要一个Python脚本来分析CSV文件中的销售数据并生成报表"),
+    ("3", "API开发", "开发一个RESTful API来管理用户信息，包括注册、登录和个人资料管理"),
+    ("4", "自动化脚本", "写一个脚本自动备份指定目录的文件到云存储"),
+    ("5", "移动应用", "开发一个简单的待办事项移动应用"),
+)
+_SCENARIO_PROMPTS = {key: prompt for key, _, prompt in _SCENARIOS}
+
+HELP = """usage: run_conversational_swe.py [--prompt PROMPT | --load SESSION_ID | --list | --demo | --demo-all]
+
+对话式软件开发智能体
+
+选项:
+  -h, --help            显示本帮助信息并退出
+  --prompt PROMPT       直接指定开发需求开始对话
+  --load SESSION_ID     加载指定的会话ID
+  --list                列出所有保存的会话
+  --demo                选择演示场景
+  --demo-all            非交互地依次运行所有演示场景
+
+示例用法:
+  run_conversational_swe.py                                    # 开始新对话
+  run_conversational_swe.py --prompt "开发一个Python爬虫"      # 直接开始指定需求的对话
+  run_conversational_swe.py --load session_20250307_143022_a1b2c3 # 加载指定会话
+  run_conversational_swe.py --list                            # 列出所有保存的会话
+  run_conversational_swe.py --demo                            # 选择演示场景
+  run_conversational_swe.py --demo-all                        # 依次运行所有演示场景
+"""
+
+# 交互模式中结束对话和开始新对话的命令（比较前先转为小写）
+_EXIT = frozenset({'exit', 'quit', '退出'})
+_NEW = frozenset({'new', '新对话'})
+
+# 智能体回复的前缀
+_REPLY_PREFIX = "🤖 助手: "
+
+# 交互模式的欢迎信息，一次写入标准输出
+_BANNER = """🤖 欢迎使用对话式软件开发智能体！
+💡 我可以帮助您:
+   - 分析和澄清开发需求
+   - 进行对话式代码开发
+   - 跟踪项目进度
+   - 审查代码质量
+   - 回答技术问题
+
+📝 您可以随时输入 'exit' 或 'quit' 来结束对话
+🔄 输入 'new' 开始新的对话
+💾 会话会自动保存，可以随时恢复
+
+"""
+
+
+async def _print_stream(chunks: AsyncIterator[str]) -> None:
+    """边生成边输出智能体的回复"""
+    sys.stdout.write(_REPLY_PREFIX)
+    async for chunk in chunks:
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+    sys.stdout.write("\n\n")
+    sys.stdout.flush()
+
+
+def _log_error(message: str) -> None:
+    """记录错误日志，日志模块依赖配置加载，只在出错时导入"""
+    from app.logger import logger
+    logger.opt(depth=1).error(message)
+
+
+@functools.cache
+def _agent() -> "ConversationalSWEAgent":
+    """获取进程内共享的智能体实例，避免各入口重复初始化LLM客户端和工具"""
+    from app.agent.conversational_swe import ConversationalSWEAgent
+    return ConversationalSWEAgent()
+
+
+async def interactive_mode(agent: "ConversationalSWEAgent", initial_prompt: Optional[str] = None):
     """交互式对话模式"""
-    print("🤖 欢迎使用对话式软件开发智能体！")
-    print("💡 我可以帮助您:")
-    print("   - 分析和澄清开发需求")
-    print("   - 进行对话式代码开发")
-    print("   - 跟踪项目进度")
-    print("   - 审查代码质量")
-    print("   - 回答技术问题")
-    print("\n📝 您可以随时输入 'exit' 或 'quit' 来结束对话")
-    print("🔄 输入 'new' 开始新的对话")
-    print("💾 会话会自动保存，可以随时恢复\n")
+    sys.stdout.write(_BANNER)
+    sys.stdout.flush()
 
     try:
         if initial_prompt:
             print(f"👤 用户: {initial_prompt}")
-            result = await agent.run(initial_prompt)
-            print(f"🤖 助手: {result}\n")
+            await _print_stream(agent.stream(initial_prompt))
 
         while True:
-            try:
-                user_input = input("👤 您: ").strip()
+            if _shutdown.is_set():
+                print("\n⚠️ 检测到中断信号，正在保存会话...")
+                break
 
-                if not user_input:
-                    continue
+            # 等待用户输入期间在后台预热LLM连接，输入到达后取消尚未完成的预热
+            prefetch = asyncio.create_task(agent.warm_llm())
+            try:
+                # 快速连续到达的多行（如粘贴）合并为一条消息，只调用一次智能体
+                user_input = "\n".join(await ainput_lines("👤 您: ")).strip()
+            finally:
+                prefetch.cancel()
+                await asyncio.gather(prefetch, return_exceptions=True)
+
+            if not user_input:
+                continue
+
+            lowered = user_input.lower()
+            if lowered in _EXIT:
+                print("👋 感谢使用！会话已保存。")
+                break
 
-                if user_input.lower() in ['exit', 'quit', '退出']:
-                    print("👋 感谢使用！会话已保存。")
-                    break
+            if lowered in _NEW:
+                print("🆕 开始新对话...")
+                new_input = (await ainput("👤 请描述您的开发需求: ")).strip()
+                if new_input:
+                    result = await agent.start_new_conversation(new_input)
+                    sys.stdout.writelines((_REPLY_PREFIX, result, "\n\n"))
+                    sys.stdout.flush()
+                continue
 
-                if user_input.lower() in ['new', '新对话']:
-                    print("🆕 开始新对话...")
-                    new_input = input("👤 请描述您的开发需求: ").strip()
-                    if new_input:
-                        result = await agent.start_new_conversation(new_input)
-                        print(f"🤖 助手: {result}\n")
-                    continue
+            # 处理用户输入
+            await agent.handle_user_response(user_input)
+            await _print_stream(agent.stream())
 
-                # 处理用户输入
-                await agent.handle_user_response(user_input)
-                result = await agent.run()
-                print(f"🤖 助手: {result}\n")
+    except EOFError:
+        print("\n👋 输入已结束，会话已保存。")
 
-            except KeyboardInterrupt:
-                print("\n⚠️ 检测到中断信号，正在保存会话...")
-                break
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n⚠️ 检测到中断信号，正在保存会话...")
 
     except Exception as e:
-        logger.error(f"交互过程中出错: {e}")
+        _log_error(f"交互过程中出错: {e}")
         print(f"❌ 发生错误: {e}")
 
+    finally:
+        # 每轮结束只提交保存请求，退出前等待最后一次写入完成
+        await agent.flush_session()
+
 
 async def list_sessions():
     """列出所有保存的会话"""
-    agent = ConversationalSWEAgent()
-    sessions = agent.list_saved_sessions()
+    agent = _agent()
+    sessions = await agent.list_saved_sessions_async()
 
     if not sessions:
         print("📋 当前没有保存的会话")
         return
 
-    print(f"📚 找到 {len(sessions)} 个保存的会话:\n")
+    # 先拼接全部会话信息，再一次写入标准输出
+    lines = [f"📚 找到 {len(sessions)} 个保存的会话:\n\n"]
 
     for i, session in enumerate(sessions, 1):
-        print(f"{i}. 会话ID: {session['session_id']}")
-        print(f"   📅 创建时间: {session['created_at']}")
-        print(f"   💬 对话轮次: {session['conversation_turns']}")
-        print(f"   📊 执行步骤: {session['steps']}")
+        lines.append(f"{i}. 会话ID: {session['session_id']}\n")
+        lines.append(f"   📅 创建时间: {session['created_at']}\n")
+        lines.append(f"   💬 对话轮次: {session['conversation_turns']}\n")
+        lines.append(f"   📊 执行步骤: {session['steps']}\n")
         if session['summary']:
-            print(f"   📝 摘要: {session['summary'][:100]}...")
-        print(f"   📁 文件路径: {session['file_path']}")
-        print()
+            lines.append(f"   📝 摘要: {session['summary'][:100]}...\n")
+        lines.append(f"   📁 文件路径: {session['file_path']}\n\n")
+
+    sys.stdout.write("".join(lines))
+    sys.stdout.flush()
 
 
 async def load_session(session_id: str):
     """加载指定的会话"""
-    agent = ConversationalSWEAgent()
+    agent = _agent()
     session_file = f"conversations/{session_id}.json"
 
-    success = await agent.load_session(session_file)
-    if not success:
-        print(f"❌ 无法加载会话: {session_id}")
-        print("💡 使用 --list 查看所有可用会话")
-        return
+    # 读取会话文件的同时在后台预热LLM连接，不等待预热完成即显示提示符
+    warm_task = asyncio.create_task(agent.warm_llm())
+    try:
+        success = await agent.load_session(session_file)
+        if not success:
+            print(f"❌ 无法加载会话: {session_id}")
+            print("💡 使用 --list 查看所有可用会话")
+            return
 
-    print(f"✅ 成功加载会话: {session_id}")
-    print(f"📊 {agent.get_conversation_summary()}\n")
+        print(f"✅ 成功加载会话: {session_id}")
+        print(f"📊 {agent.get_conversation_summary()}\n")
 
-    # 进入交互模式
-    await interactive_mode(agent)
+        # 进入交互模式
+        await interactive_mode(agent)
+    finally:
+        warm_task.cancel()
+        await asyncio.gather(warm_task, return_exceptions=True)
 
 
 async def start_new_session(prompt: Optional[str] = None):
     """开始新的会话"""
-    agent = ConversationalSWEAgent()
+    agent = _agent()
 
     if not prompt:
-        prompt = input("👤 请描述您的开发需求: ").strip()
+        prompt = (await ainput("👤 请描述您的开发需求: ")).strip()
         if not prompt:
             print("❌ 请提供有效的需求描述")
             return
@@ -131,100 +375,72 @@ async def start_new_session(prompt: Optional[str] = None):
     await interactive_mode(agent, prompt)
 
 
-def create_demo_scenarios():
+async def create_demo_scenarios():
     """创建一些演示场景"""
-    scenarios = {
-        "1": {
-            "title": "Web应用开发",
-            "prompt": "我想开发一个简单的博客网站，用户可以发布文章和评论"
-        },
-        "2": {
-            "title": "数据分析工具",
-            "prompt": "需要一个Python脚本来分析CSV文件中的销售数据并生成报表"
-        },
-        "3": {
-            "title": "API开发",
-            "prompt": "开发一个RESTful API来管理用户信息，包括注册、登录和个人资料管理"
-        },
-        "4": {
-            "title": "自动化脚本",
-            "prompt": "写一个脚本自动备份指定目录的文件到云存储"
-        },
-        "5": {
-            "title": "移动应用",
-            "prompt": "开发一个简单的待办事项移动应用"
-        }
-    }
-
     print("🎯 选择一个演示场景开始:")
-    for key, scenario in scenarios.items():
-        print(f"   {key}. {scenario['title']}: {scenario['prompt']}")
+    for key, title, prompt in _SCENARIOS:
+        print(f"   {key}. {title}: {prompt}")
+
+    choice = (await ainput("\n请选择场景编号 (1-5) 或按回车自定义: ")).strip()
+
+    return _SCENARIO_PROMPTS.get(choice)
+
+
+async def run_all_demos():
+    """非交互地依次运行所有演示场景
+
+    场景共用同一工作区和沙箱（每次运行结束都会清理沙箱），ask_human 的 input() 也会阻塞整个事件循环，
+    因此逐个运行；单个场景失败不影响后续场景
+    """
+    from app.agent.conversational_swe import ConversationalSWEAgent
 
-    choice = input("\n请选择场景编号 (1-5) 或按回车自定义: ").strip()
+    for key, title, prompt in _SCENARIOS:
+        agent = ConversationalSWEAgent()
+        # 会话ID加上场景编号，便于区分各场景保存的会话
+        agent.session_id = f"{agent.session_id}_demo{key}"
+        agent.session_file = f"conversations/{agent.session_id}.json"
 
-    if choice in scenarios:
-        return scenarios[choice]["prompt"]
-    else:
-        return None
+        print(f"🚀 [{key}] {title}: {prompt}")
+        try:
+            result = await agent.run(prompt)
+        except Exception as e:
+            _log_error(f"演示场景 {key} 运行出错: {e}")
+            print(f"❌ [{key}] {title} 运行失败: {e}\n")
+            continue
+        finally:
+            await agent.flush_session()
+        print(f"🤖 [{key}] {title} 完成:\n{result}\n")
 
 
 async def main():
     """主函数"""
-    parser = argparse.ArgumentParser(
-        description="对话式软件开发智能体",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-示例用法:
-  %(prog)s                                    # 开始新对话
-  %(prog)s --prompt "开发一个Python爬虫"      # 直接开始指定需求的对话
-  %(prog)s --load session_20250307_143022     # 加载指定会话
-  %(prog)s --list                            # 列出所有保存的会话
-  %(prog)s --demo                            # 选择演示场景
-        """
-    )
-
-    parser.add_argument(
-        "--prompt",
-        type=str,
-        help="直接指定开发需求开始对话"
-    )
-
-    parser.add_argument(
-        "--load",
-        type=str,
-        metavar="SESSION_ID",
-        help="加载指定的会话ID"
-    )
-
-    parser.add_argument(
-        "--list",
-        action="store_true",
-        help="列出所有保存的会话"
-    )
-
-    parser.add_argument(
-        "--demo",
-        action="store_true",
-        help="选择演示场景"
-    )
-
-    args = parser.parse_args()
-
     try:
-        if args.list:
-            await list_sessions()
-        elif args.load:
-            await load_session(args.load)
-        elif args.demo:
-            prompt = create_demo_scenarios()
-            await start_new_session(prompt)
-        else:
-            await start_new_session(args.prompt)
-
-    except KeyboardInterrupt:
+        # 参数组合固定且数量很少，直接匹配 sys.argv，不必初始化 argparse
+        match sys.argv[1:]:
+            case []:
+                await start_new_session()
+            case ["-h" | "--help"]:
+                sys.stdout.write(HELP)
+            case ["--list"]:
+                await list_sessions()
+            case ["--load", session_id]:
+                await load_session(session_id)
+            case ["--demo"]:
+                prompt = await create_demo_scenarios()
+                await start_new_session(prompt)
+            case ["--demo-all"]:
+                await run_all_demos()
+            case ["--prompt", prompt]:
+                await start_new_session(prompt)
+            case _:
+                sys.stderr.write(HELP)
+                sys.exit(2)
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        # 智能体执行期间的 Ctrl+C 由事件循环默认处理：第一次取消主任务，第二次抛出 KeyboardInterrupt
         print("\n👋 程序已退出")
     except Exception as e:
-        logger.error(f"程序运行出错: {e}")
+        _log_error(f"程序运行出错: {e}")
         print(f"❌ 程序运行出错: {e}")
         sys.exit(1)
 
@@ -232,4 +448,11 @@ async def main():
 if __name__ == "__main__":
     print("🔧 对话式软件开发智能体 v1.0")
     print("=" * 50)
-    asyncio.run(main())
+    try:
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
+    except KeyboardInterrupt:
+        # 同步阻塞调用中再次按下 Ctrl+C 时，KeyboardInterrupt 会越过事件循环直接到达这里
+        print("\n👋 程序已退出")
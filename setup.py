@@ -31,6 +31,7 @@ setup(
         "browser-use~=0.1.40",
         "googlesearch-python~=1.3.0",
         "aiofiles~=24.1.0",
+        "orjson>=3.9.0",
         "pydantic_core>=2.27.2,<2.28.0",
         "colorama~=0.4.6",
     ],
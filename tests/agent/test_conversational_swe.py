@@ -0,0 +1,195 @@
+import asyncio
+import json
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+import tiktoken
+
+import app.agent.conversational_swe as conversational_swe
+from app.agent.conversational_swe import (
+    ConversationalSWEAgent,
+    _history_log_path,
+    _session_meta_path,
+)
+
+
+class _FakeEncoding:
+    """Stands in for a tiktoken encoding so tests never download one."""
+
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def agent(monkeypatch, tmp_path) -> ConversationalSWEAgent:
+    """Creates an agent whose session files go to a temporary directory."""
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: _FakeEncoding())
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: _FakeEncoding())
+    monkeypatch.chdir(tmp_path)
+    return ConversationalSWEAgent()
+
+
+@pytest.mark.parametrize(
+    "user_input, expected",
+    [
+        ("我习惯用 conda，偶尔用 pip", {"包管理": "conda"}),
+        ("先用 pip 再换 conda", {"包管理": "conda"}),
+        ("pip 和 poetry 都行", {"包管理": "poetry"}),
+        ("用 Python3.11 和 pytest，代码用 Black 格式化", {
+            "python版本": "python3.11",
+            "测试框架": "pytest",
+            "代码风格": "black",
+        }),
+        ("没有特别的要求", {}),
+    ],
+)
+def test_extract_user_preferences(agent, user_input, expected):
+    """Tests that the later keyword in table order wins, regardless of input order."""
+    agent._extract_user_preferences(user_input)
+    assert agent.user_preferences == expected
+
+
+def test_session_ids_are_unique(agent):
+    """Tests that agents created within the same second get distinct session files."""
+    other = ConversationalSWEAgent()
+    assert agent.session_id != other.session_id
+    assert agent.session_file != other.session_file
+
+
+def test_progress_tracker_is_per_agent(agent):
+    """Tests that each agent gets its own progress tracker while stateless tools are shared."""
+    other = ConversationalSWEAgent()
+    tracker = agent.available_tools.tool_map["project_progress_tracker"]
+    assert tracker is not other.available_tools.tool_map["project_progress_tracker"]
+    review = agent.available_tools.tool_map["conversational_code_review"]
+    assert review is other.available_tools.tool_map["conversational_code_review"]
+
+
+@pytest.mark.asyncio
+async def test_session_round_trip(agent):
+    """Tests that a saved session, its meta sidecar and history journal load back."""
+    agent.user_preferences = {"包管理": "conda"}
+    agent.update_conversation_context("project_type", "cli")
+    agent.update_memory("user", "写一个爬虫")
+    agent.update_memory("assistant", "好的")
+    agent.add_development_record("创建文件", details="spider.py")
+    agent.add_development_record("运行测试", result="通过")
+    await agent.save_session()
+    await agent.flush_session()
+
+    history_log = Path(_history_log_path(agent.session_file))
+    assert len(history_log.read_bytes().splitlines()) == 2
+    meta = json.loads(Path(_session_meta_path(agent.session_file)).read_text(encoding="utf-8"))
+    assert meta["session_id"] == agent.session_id
+    assert "messages" not in meta
+
+    loaded = ConversationalSWEAgent()
+    assert await loaded.load_session(agent.session_file)
+    assert loaded.session_id == agent.session_id
+    assert loaded.user_preferences == {"包管理": "conda"}
+    assert loaded.conversation_context["project_type"] == "cli"
+    assert [(m.role, m.content) for m in loaded.messages] == [
+        ("user", "写一个爬虫"),
+        ("assistant", "好的"),
+    ]
+    assert [r["action"] for r in loaded.development_history] == ["创建文件", "运行测试"]
+
+    # Records added after loading go to the same journal.
+    loaded.add_development_record("修复缺陷")
+    await loaded.flush_history_log()
+    assert len(history_log.read_bytes().splitlines()) == 3
+
+
+@pytest.mark.asyncio
+async def test_history_log_handle_outlives_turns(agent):
+    """Tests that the journal stays open across turns and closes when the session is flushed."""
+    agent.add_development_record("创建文件")
+    await agent.flush_history_log()
+    handle = agent._history_file
+    assert handle is not None
+
+    # cleanup() runs at the end of every turn.
+    await agent.cleanup()
+    agent.add_development_record("运行测试")
+    await agent.flush_history_log()
+    assert agent._history_file is handle
+
+    await agent.flush_session()
+    assert agent._history_file is None and handle.closed
+    assert len(Path(_history_log_path(agent.session_file)).read_bytes().splitlines()) == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_history_write_does_not_race(agent, monkeypatch):
+    """Tests that the final drain on cancel waits for the worker that is still writing."""
+    started = threading.Event()
+    release = threading.Event()
+    real_ensure_dir = conversational_swe._ensure_dir
+
+    def slow_ensure_dir(path):
+        # Block the worker after it popped the first record and before it opens the journal.
+        if threading.current_thread() is not threading.main_thread():
+            started.set()
+            release.wait(5)
+        real_ensure_dir(path)
+
+    monkeypatch.setattr(conversational_swe, "_ensure_dir", slow_ensure_dir)
+    agent.add_development_record("第一条")
+    task = agent._history_task
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+    agent.add_development_record("第二条")
+
+    task.cancel()
+    threading.Timer(0.05, release.set).start()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    lines = Path(_history_log_path(agent.session_file)).read_bytes().splitlines()
+    assert [json.loads(line)["action"] for line in lines] == ["第一条", "第二条"]
+
+
+@pytest.mark.asyncio
+async def test_save_recreates_removed_directory(agent):
+    """Tests that saving still works after the conversations directory was removed."""
+    await agent.save_session()
+    await agent.flush_session()
+    shutil.rmtree("conversations")
+
+    agent.add_development_record("创建文件")
+    await agent.save_session()
+    await agent.flush_session()
+    assert Path(agent.session_file).exists()
+    assert Path(_history_log_path(agent.session_file)).exists()
+
+
+@pytest.mark.asyncio
+async def test_history_log_skips_torn_line(agent):
+    """Tests that a journal line torn by a crash is skipped on load."""
+    agent.add_development_record("创建文件")
+    await agent.save_session()
+    await agent.flush_session()
+    with open(_history_log_path(agent.session_file), "ab") as f:
+        f.write('{"action": "写到一半'.encode())
+
+    loaded = ConversationalSWEAgent()
+    assert await loaded.load_session(agent.session_file)
+    assert [r["action"] for r in loaded.development_history] == ["创建文件"]
+
+
+@pytest.mark.asyncio
+async def test_legacy_session_migrates_history(agent):
+    """Tests that history embedded in an old session file moves into the journal."""
+    session_file = Path("conversations/session_legacy.json")
+    session_file.parent.mkdir()
+    session_file.write_text(json.dumps({
+        "session_id": "session_legacy",
+        "development_history": [{"action": "旧记录"}],
+        "messages": [],
+    }), encoding="utf-8")
+
+    assert await agent.load_session(str(session_file))
+    await agent.flush_session()
+    assert [r["action"] for r in agent.development_history] == ["旧记录"]
+    assert json.loads(Path(_history_log_path(str(session_file))).read_bytes()) == {"action": "旧记录"}
@@ -0,0 +1,74 @@
+import pytest
+
+from app.tool.conversation_swe_tools import ConversationalCodeReview
+
+
+@pytest.fixture
+def review() -> ConversationalCodeReview:
+    """Creates the code review tool."""
+    return ConversationalCodeReview()
+
+
+def _messages(analysis, kind):
+    """Returns the messages of the given analysis entries."""
+    return [item["message"] for item in analysis[kind]]
+
+
+def test_long_lines_and_comments(review):
+    """Tests that the readability scan counts long lines and comment lines."""
+    content = "\n".join([
+        "# 注释",
+        "x = '" + "a" * 120 + "'",
+        "    # " + "b" * 120,
+        "y = 1",
+    ])
+    analysis = review._analyze_code(content, "demo.js", "readability")
+    issue = analysis["issues"][0]
+    assert issue["message"] == "发现 2 行超过100字符的长行"
+    assert issue["lines"] == [2, 3]
+    # 2 of 4 lines are comments, so no comment suggestion
+    assert analysis["suggestions"] == []
+
+
+def test_keyword_needs_text_after_it(review):
+    """Tests that a bare 'for ' or 'def ' line is not counted, matching str.startswith on stripped lines."""
+    content = "def f():\n    for \n    for x in a:\n        for y in b:\n            pass\n"
+    analysis = review._analyze_code(content, "demo.txt", "performance")
+    assert _messages(analysis, "issues") == ["发现 1 处嵌套循环"]
+
+
+def test_heuristic_nesting_resets_at_top_level(review):
+    """Tests that a top-level line ends the enclosing loop in the line-based scan."""
+    content = "def f():\n    for x in a:\n        pass\ny = 1\n    for y in b:\n        pass\n"
+    analysis = review._analyze_code(content, "demo.txt", "performance")
+    assert analysis["issues"] == []
+
+
+def test_python_files_use_the_syntax_tree(review):
+    """Tests that .py files count nested loops and long functions from the AST."""
+    body = "\n".join("    x = %d" % i for i in range(55))
+    content = (
+        "def long_function():\n" + body + "\n"
+        "\n"
+        "def loops(a, b):\n"
+        "    for x in a:\n"
+        "        while b:\n"
+        "            break\n"
+    )
+    analysis = review._analyze_code(content, "demo.py", "all")
+    assert "发现 1 处嵌套循环" in _messages(analysis, "issues")
+    assert "发现 1 个长函数(>50行)" in _messages(analysis, "suggestions")
+
+
+def test_unparsable_python_falls_back_to_heuristic(review):
+    """Tests that a .py file with a syntax error still gets the line-based scan."""
+    content = "def f(:\n    for x in a:\n        for y in b:\n            pass\n"
+    analysis = review._analyze_code(content, "broken.py", "performance")
+    assert _messages(analysis, "issues") == ["发现 1 处嵌套循环"]
+
+
+def test_security_scan(review):
+    """Tests that formatted SQL and hard-coded secrets are reported."""
+    content = 'password = "hunter2"\ncursor.execute("SELECT * FROM t WHERE id=%s" % uid)\n'
+    analysis = review._analyze_code(content, "db.py", "security")
+    assert _messages(analysis, "issues") == ["可能存在SQL注入风险", "可能存在硬编码敏感信息"]
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.tool.conversation_swe_tools import ProjectProgressTracker
+
+
+@pytest.fixture
+def tracker(tmp_path) -> ProjectProgressTracker:
+    """Creates a tracker that writes its progress file to a temporary directory."""
+    return ProjectProgressTracker(progress_file=str(tmp_path / "project_progress.json"))
+
+
+@pytest.mark.asyncio
+async def test_changes_stay_in_memory_until_flush(tracker, tmp_path):
+    """Tests that edits are batched in memory and written on flush."""
+    progress_file = tmp_path / "project_progress.json"
+    await tracker.execute("create_milestone", milestone_name="MVP")
+    await tracker.execute("add_task", task_name="登录", milestone_name="MVP")
+    await tracker.execute("complete_task", task_name="登录")
+    assert not progress_file.exists()
+
+    assert "已保存" in await tracker.execute("flush")
+    data = json.loads(progress_file.read_text(encoding="utf-8"))
+    assert data["milestones"][0]["progress"] == 100
+    assert data["tasks"][0]["status"] == "completed"
+    assert "无需保存" in await tracker.execute("flush")
+
+
+@pytest.mark.asyncio
+async def test_flush_replaces_file_atomically(tracker, tmp_path):
+    """Tests that a flush leaves no temporary file behind and overwrites the old file."""
+    progress_file = tmp_path / "project_progress.json"
+    progress_file.write_text("损坏的内容", encoding="utf-8")
+
+    await tracker.execute("create_milestone", milestone_name="MVP")
+    await tracker.execute("flush")
+    assert json.loads(progress_file.read_text(encoding="utf-8"))["milestones"][0]["name"] == "MVP"
+    assert [p.name for p in tmp_path.iterdir()] == ["project_progress.json"]
+
+
+@pytest.mark.asyncio
+async def test_cleanup_writes_pending_changes(tracker, tmp_path):
+    """Tests that cleanup flushes changes that were never flushed explicitly."""
+    await tracker.execute("add_task", task_name="部署")
+    await tracker.cleanup()
+
+    data = json.loads((tmp_path / "project_progress.json").read_text(encoding="utf-8"))
+    assert [task["name"] for task in data["tasks"]] == ["部署"]
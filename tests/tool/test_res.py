@@ -0,0 +1,45 @@
+from math import inf
+
+from app.tool.res import resolution
+
+
+def test_single_obstacle_free_cell():
+    """Tests distances around a single non-zero cell."""
+    assert resolution([[0, 0, 0], [0, 1, 0], [0, 0, 0]]) == [
+        [0, 0, 0],
+        [0, 1, 0],
+        [0, 0, 0],
+    ]
+
+
+def test_distances_grow_along_path():
+    """Tests that distances follow the shortest path around walls."""
+    matrix = [
+        [0, 1, 1],
+        [2, 2, 1],
+        [1, 1, 1],
+    ]
+    assert resolution(matrix) == [
+        [0, 1, 2],
+        [inf, inf, 3],
+        [6, 5, 4],
+    ]
+
+
+def test_unreachable_cells_are_inf():
+    """Tests that cells cut off by walls stay at inf."""
+    assert resolution([[1, 2, 0]]) == [[inf, inf, 0]]
+    assert resolution([[1, 1], [1, 1]]) == [[inf, inf], [inf, inf]]
+
+
+def test_non_square_grid():
+    """Tests that rows and columns are not swapped on non-square grids."""
+    assert resolution([[0, 1, 1, 1], [1, 1, 2, 1]]) == [
+        [0, 1, 2, 3],
+        [1, 2, inf, 4],
+    ]
+
+
+def test_multiple_sources_take_nearest_zero():
+    """Tests that each cell gets the distance to its nearest zero."""
+    assert resolution([[0, 1, 1, 1, 0]]) == [[0, 1, 2, 1, 0]]